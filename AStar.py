@@ -1,10 +1,56 @@
 #!/usr/bin/python3
-from queue import PriorityQueue
+import copy
+import heapq
 import itertools
+import mmap
+import sys
 import random
 import time
 import threading
-from typing import Optional, Set, Tuple
+from typing import Optional, List, Set, Tuple
+
+# Exceptions
+
+
+class SolveInterrupted(RuntimeError):
+    """
+    Raised by AStarSolver.solve when one of its limits stops the search before a path is found.
+        Attributes:
+            reason (str) - Which limit stopped the search, one of "max_nodes", "max_memory", "deadline" or "cancelled".
+            nodes_considered (int) - The number of nodes considered before the search was stopped.
+            time_taken (int) - The time spent searching in ms.
+            best_state (State) - The expanded state with the lowest heuristic, its .path attribute is the best partial path.
+    """
+
+    def __init__(self, reason: str, nodes_considered: int, time_taken: int, best_state=None):
+        super(SolveInterrupted, self).__init__(
+            "Solve stopped (" + reason + ") after " + str(nodes_considered) + " nodes")
+        self.reason = reason
+        self.nodes_considered = nodes_considered
+        self.time_taken = time_taken
+        self.best_state = best_state
+
+
+def get_memory_usage() -> int:
+    """
+    Returns the resident memory of this process in bytes.\n
+    Reads /proc where it is available, otherwise falls back to the peak usage reported by the resource module.
+    Returns 0 if neither can be used (memory limits are then ignored).
+    """
+
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * mmap.PAGESIZE
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import resource
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes everywhere else.
+        return usage if sys.platform == "darwin" else usage * 1024
+    except ImportError:
+        return 0
 
 # States
 
@@ -28,6 +74,8 @@ class State(object):
         self.parent = parent
         self.value = value
         self.dist = 0
+        # The heuristic part of the distance, used to find the closest state when a solve is stopped early.
+        self.h = 0
         if parent:
             # If this state has a parent, take some parameters from the parent
             self.path = parent.path[:]
@@ -63,12 +111,22 @@ class StateString(State):
             parent - This states parent.
             start - The start value for this state.
             goal - The goal value for this state.
+            dist (int) - The distance heuristic, if it has already been worked out (see create_children).
     """
 
-    def __init__(self, value: str, parent: Optional[State], start: str = "", goal: str = ""):
+    def __init__(self, value: str, parent: Optional[State], start: str = "", goal: str = "", dist: Optional[int] = None):
 
         super(StateString, self).__init__(value, parent, start, goal)
-        self.dist = self.get_dist()
+        self.dist = self.get_dist() if dist == None else dist
+        self.h = self.dist
+
+        # The goal positions of each letter, shared by every state of the search
+        if parent:
+            self.goal_positions = parent.goal_positions
+        else:
+            self.goal_positions = {}
+            for i, letter in enumerate(self.goal):
+                self.goal_positions.setdefault(letter, []).append(i)
 
     def get_dist(self) -> int:
         """
@@ -101,39 +159,69 @@ class StateString(State):
                     goal_store.pop(goal_letter_pos)
         return dist
 
+    def get_letter_cost(self, letter: str, positions: List[int]) -> int:
+        """
+        Returns how much a letter adds to the distance heuristic, given its positions (in order).
+        This is the same as get_dist, where a letter which occurs n times in the goal is counted n times.
+        """
+
+        goal_positions = self.goal_positions[letter]
+        cost = 0
+        for goal_position, position in zip(goal_positions, positions):
+            cost += abs(goal_position - position)
+        return cost * len(goal_positions)
+
     def create_children(self, forbidden_states: Optional[set] = set()):
         """
         Create the children of this state\n
-        Can optionally be passed a forbidden_states set to prevent these states from being generated.
+        Can optionally be passed a forbidden_states set to prevent these states from being generated.\n
+        The children are generated in one pass, a swap only moves two letters so the distance of each child is worked out
+        from the cost of those letters rather than with get_dist.
         """
 
         if not self.children:
-            # Generate all permutations of the string (with one swap)
-            permutations = set()
-            for i in range(len(self.goal)):
-                for x in range(len(self.goal)):
-                    val = list(self.value)
-                    val[i], val[x] = val[x], val[i]
-
-                    # Convert permutation to a string
-                    val = "".join(val)
-
-                    if self.__valid_perm(val, permutations):
-                        # If the permutation is valid, add it to the permutations list
-                        permutations.add(val)
-            for item in permutations:
-
-                if not(item in forbidden_states):
-                    child = StateString(item, self)
-                    self.children.append(child)
-
-    def __valid_perm(self, val: str, permutations: Set[str]):
-        "Check whether permutation is a valid one."
-        if val == self.value:
-            return False
-        elif val in permutations:
-            return False
-        return True
+            letters = list(self.value)
+            length = len(letters)
+
+            # The positions of each letter, and how much each letter currently adds to the distance
+            positions = {}
+            for i, letter in enumerate(letters):
+                positions.setdefault(letter, []).append(i)
+            costs = {letter: self.get_letter_cost(letter, letter_positions)
+                     for letter, letter_positions in positions.items()}
+
+            # Generate every string which is one swap away from this one
+            for i in range(length):
+                a = letters[i]
+                for x in range(i + 1, length):
+                    b = letters[x]
+                    if a == b:
+                        continue
+
+                    letters[i], letters[x] = b, a
+                    val = "".join(letters)
+                    letters[i], letters[x] = a, b
+                    if val in forbidden_states:
+                        continue
+
+                    dist = self.dist - costs[a] - costs[b] + self.__get_moved_cost(
+                        a, positions[a], i, x) + self.__get_moved_cost(b, positions[b], x, i)
+                    self.children.append(StateString(val, self, dist=dist))
+
+    def __get_moved_cost(self, letter: str, positions: List[int], old: int, new: int) -> int:
+        """Returns the cost of a letter after the occurance at old is moved to new."""
+
+        if len(positions) == 1:
+            return abs(self.goal_positions[letter][0] - new)
+        moved = sorted(new if position == old else position
+                       for position in positions)
+        return self.get_letter_cost(letter, moved)
+
+
+# The moves a State2DMovement can make as (x, y, cost)
+STRAIGHT_MOVES = [(1, 0, 1), (0, 1, 1), (-1, 0, 1), (0, -1, 1)]
+DIAGONAL_MOVES = STRAIGHT_MOVES + \
+    [(1, 1, 2), (1, -1, 2), (-1, 1, 2), (-1, -1, 2)]
 
 
 class State2DMovement(State):
@@ -145,14 +233,21 @@ class State2DMovement(State):
             start (tuple) - The start coordinate.
             goal (tuple) - The goal coordinate
             diagonal_enabled (bool) - Whether diagonal moving is enabled.
+            g (int) - The cost of the path to this state, if it has already been worked out (see create_children).
+            h (int) - The distance from this state to the goal, must be given along with g.
     """
 
-    def __init__(self, value: Tuple[int, int], parent: Optional[State] = 0, start: Optional[Tuple[int, int]] = None, goal: Optional[Tuple[int, int]] = None, diagonal_enabled: Optional[bool] = False):
+    def __init__(self, value: Tuple[int, int], parent: Optional[State] = 0, start: Optional[Tuple[int, int]] = None, goal: Optional[Tuple[int, int]] = None, diagonal_enabled: Optional[bool] = False, g: Optional[int] = None, h: Optional[int] = None):
 
         super(State2DMovement, self).__init__(
             tuple(value), parent, start, goal)
         self.diagonal_enabled = diagonal_enabled
-        self.dist = self.get_dist()
+        if g == None:
+            self.dist = self.get_dist()
+        else:
+            self.g = g
+            self.h = h
+            self.dist = g + h if h else 0
 
     def get_dist(self):
         """Calculate the distance heuristic for this object."""
@@ -181,6 +276,8 @@ class State2DMovement(State):
         else:
             self.g = 0
             self.h = 0
+            for i in range(len(self.value)):
+                self.h += abs(self.value[i] - self.goal[i])
 
         return dist
 
@@ -192,17 +289,18 @@ class State2DMovement(State):
 
         # If children have not already been generated
         if not self.children:
-            # Create transformation vectors. If diagonal movement is enabled, create the diagonal move vectors.
-            allowed_moves = [[1, 0], [0, 1], [-1, 0], [0, -1]]
-            if self.diagonal_enabled:
-                allowed_moves += [[1, 1], [1, -1], [-1, 1], [-1, -1]]
-
-            # Create new state objects with the vectors
-            for vector in allowed_moves:
-                val = (self.value[0] + vector[0], self.value[1] + vector[1])
+            # The move vectors and their costs. If diagonal movement is enabled, include the diagonal moves.
+            allowed_moves = DIAGONAL_MOVES if self.diagonal_enabled else STRAIGHT_MOVES
+            x, y = self.value
+            goal_x, goal_y = self.goal
+            g = getattr(self, "g", 0)
+
+            # Create new state objects with the vectors, working out g and h here rather than in get_dist
+            for move_x, move_y, cost in allowed_moves:
+                val = (x + move_x, y + move_y)
                 if not(val in forbidden_states):
-                    child = State2DMovement(
-                        val, self, diagonal_enabled=self.diagonal_enabled)
+                    child = State2DMovement(val, self, diagonal_enabled=self.diagonal_enabled, g=g + cost,
+                                            h=abs(val[0] - goal_x) + abs(val[1] - goal_y))
                     self.children.append(child)
 
 # Solvers
@@ -215,6 +313,7 @@ class AStarSolver:
             In order to create a functional solver based on this, you must overload the following methods:
             get_start_state(self) - Should return the starting state for the solver you are implementing.
             validate(self) - A function that validates the variables passed to the object when creating it.
+            is_reachable(self) - Optionally, a quick check of whether the goal can be reached at all (queries failing it are rejected without searching).
             update(self) - A method which is called once per loop of the sovler, 
             this can be used to update some external state for displaying progress, 
             for exmaple you could use this with the multiprocessing library to update a shared memory object.
@@ -237,71 +336,204 @@ class AStarSolver:
         self.visited_queue = visited_queue
 
         self.path = []
-        self.priority_queue = PriorityQueue()
+        # Heap of (priority, count, state) entries, only used by the solving thread so it needs no lock
+        self.priority_queue = []
 
         # Start and goal must be copies to prevent the solver from interacting with other components
-        self.start = start[:]
-        self.goal = goal[:]
+        self.start = copy.copy(start)
+        self.goal = copy.copy(goal)
         self.start_state = None
         self.time_taken = 0
         self.nodes_considered = 0
-
-    def solve(self):
+        # State of the search, kept between calls to step
+        self.search_started = False
+        self.expanded = 0
+        self.best_state = None
+        self.time_spent = 0
+        # If this is set to a AStar_trace.SearchTrace, every expanded node is recorded in it
+        self.trace = None
+        # How many nodes are expanded between checks of the slower solve limits (memory usage and cancellation)
+        self.check_interval = 64
+
+    def solve(self, max_nodes: Optional[int] = None, max_memory: Optional[int] = None, deadline: Optional[float] = None, cancel_token=None):
         """
         Creates a solution on how to get from the start, to the goal.\n
         This method returns the path created, but it can also be gained by using the .path atribute.\n
         The .paths_considered and .time_taken atributes can be looked at if you want to gauge the performance of this algorithm.\n
-        If no solution is found, this method will raise an exception, which can then be caught with a try except.
+        If no solution is found, this method will raise an exception, which can then be caught with a try except.\n
+        The search can be bounded with the following optional parameters, if one of them stops the search a SolveInterrupted exception is raised.
+            max_nodes (int) - The maximum number of nodes to consider.
+            max_memory (int) - The maximum resident memory of the process in bytes.
+            deadline (float) - A time.time() timestamp to stop searching at.
+            cancel_token - An object with an is_set method (such as a threading.Event or multiprocessing.Event), the search stops once it is set.
         """
 
-        start_time = time.time()
+        self.step(None, max_nodes, max_memory, deadline, cancel_token)
+        return self.path
+
+    def begin(self):
+        """
+        Set up the search, this is called by the first call to step (or solve).
+        """
+
+        # Reject queries which can't be solved before searching.
+        if not self.is_reachable():
+            raise RuntimeError("No path")
+
         start_state = self.get_start_state()
 
         # Check if start_state is set.
-        if start_state:
-            count = 0
+        if not start_state:
+            # If the start_state is not set, raise an exception
+            raise RuntimeError(
+                "start_state is not set. Are you instansiating the wrong class?")
 
-            # Put the starting object into the priority queue
-            self.priority_queue.put((0, count, start_state))
+        self.search_started = True
+        self.expanded = 0
+        self.best_state = start_state
 
+        # Put the starting object into the priority queue
+        heapq.heappush(self.priority_queue,
+                       (0, self.nodes_considered, start_state))
+
+    def step(self, max_expansions: Optional[int] = None, max_nodes: Optional[int] = None, max_memory: Optional[int] = None, deadline: Optional[float] = None, cancel_token=None) -> bool:
+        """
+        Carry on the search for at most max_expansions nodes (or until it finishes if it is None), the search state is kept between calls.\n
+        Returns True once the path has been found, and False if the search is not finished yet.
+        If there is no path a RuntimeError is raised, the other parameters are the same as solve.\n
+        While the search is paused the frontier can be read with get_frontier and the closed set is the .visited_queue attribute.
+        The .time_taken attribute only counts the time spent inside step.\n
+        Solvers which replace solve with a search of their own must also replace step, otherwise a TypeError is raised (see can_step).
+        """
+
+        if not self.can_step():
+            raise TypeError(type(self).__name__ +
+                            " has its own solve method and doesn't support step, use solve instead")
+        if self.path:
+            return True
+        if not self.search_started:
+            self.begin()
+
+        start_time = time.time()
+        count = self.nodes_considered
+        expanded = self.expanded
+        best_state = self.best_state
+        expansions = 0
+
+        try:
             # Loop until the path is complete, or until the queue is emptied
-            while (not self.path) and (self.priority_queue.qsize()):
-                closestChild = self.priority_queue.get()[2]
-                closestChild.create_children(self.visited_queue)
+            while (not self.path) and self.priority_queue:
+                if max_expansions != None and expansions >= max_expansions:
+                    return False
+
+                # Check the limits of the search (memory and cancellation are slower to check, so only check them periodically)
+                reason = self.check_limits(
+                    count, expanded, max_nodes, max_memory, deadline, cancel_token)
+                if reason:
+                    self.time_spent += time.time() - start_time
+                    start_time = time.time()
+                    raise SolveInterrupted(reason, count, int(
+                        round(self.time_spent * 1000, 0)), best_state)
+
+                entry = heapq.heappop(self.priority_queue)
+                closestChild = entry[2]
+                # A state can be queued more than once, its children are only needed the first time it is expanded
+                visited = closestChild.value in self.visited_queue
+                if not visited:
+                    closestChild.create_children(self.visited_queue)
+
+                    # max_nodes is a hard limit, so stop before an expansion whose children would take the count over it.
+                    # The state is put back in the queue, so the search can still be carried on by another call to step.
+                    if max_nodes != None and closestChild.value != self.goal and count + len(closestChild.children) > max_nodes:
+                        heapq.heappush(self.priority_queue, entry)
+                        self.time_spent += time.time() - start_time
+                        start_time = time.time()
+                        raise SolveInterrupted("max_nodes", count, int(
+                            round(self.time_spent * 1000, 0)), best_state)
+                expanded += 1
+                expansions += 1
+
+                # Keep track of the closest state to the goal, so it can be reported if the search is stopped.
+                if closestChild.h < best_state.h:
+                    best_state = closestChild
+
+                # Stale copies of visited states are skipped by the search, so they are left out of the trace
+                if self.trace != None and not visited:
+                    self.trace.record(closestChild.value, closestChild.dist, getattr(
+                        closestChild, "g", len(closestChild.path) - 1))
 
                 # If the goal and start value are the same, then nothing needs to be done
                 if closestChild.value == self.goal:
                     self.path = closestChild.path
                     break
 
-                # Place the children of the child that is currently being evaluated into the queue
-                for child in closestChild.children:
-                    if not(closestChild.value in self.visited_queue):
+                # Place the children of the child that is currently being evaluated into the queue (all at once)
+                if not visited:
+                    entries = []
+                    for child in closestChild.children:
                         count += 1
                         if not child.dist:
                             self.path = child.path
                             break
-                        self.priority_queue.put((child.dist, count, child))
+                        entries.append((child.dist, count, child))
+                    self.put_many(entries)
 
                 # Place the evalutaed child into the visited queue
                 self.visited_queue.add(closestChild.value)
+                self.nodes_considered = count
 
                 # Call the update method, this won't do anything unless it is over riden by a sub-class
                 self.update()
-
-            end_time = time.time()
-            self.time_taken = int(round((end_time - start_time) * 1000, 0))
+        finally:
+            # Save the search state so it can be carried on by the next call
             self.nodes_considered = count
+            self.expanded = expanded
+            self.best_state = best_state
+            self.time_spent += time.time() - start_time
+            self.time_taken = int(round(self.time_spent * 1000, 0))
 
-            # If the loop completes without setting the path, raise an exception
-            if not self.path:
-                raise RuntimeError("No path")
+        # If the loop completes without setting the path, raise an exception
+        if not self.path:
+            raise RuntimeError("No path")
 
-            return self.path
-        else:
-            # If the start_state is not set, raise an exception
-            raise RuntimeError(
-                "start_state is not set. Are you instansiating the wrong class?")
+        return True
+
+    def can_step(self) -> bool:
+        """
+        Returns whether the search can be run with step. The step method of this class searches State objects,
+        so a sub-class which replaces solve (with a search that doesn't use them) can only be stepped if it replaces step too.
+        """
+
+        return type(self).solve is AStarSolver.solve or type(self).step is not AStarSolver.step
+
+    def put_many(self, entries: List[tuple]):
+        """Add (priority, count, state) entries to the priority queue."""
+
+        queue = self.priority_queue
+        for entry in entries:
+            heapq.heappush(queue, entry)
+
+    def get_frontier(self) -> list:
+        """Returns the values of the states waiting to be expanded (the open list), in no particular order."""
+
+        return [item[2].value for item in self.priority_queue]
+
+    def check_limits(self, count: int, expanded: int, max_nodes: Optional[int], max_memory: Optional[int], deadline: Optional[float], cancel_token) -> Optional[str]:
+        """
+        Check the limits passed to solve, returns the reason the search should stop (see SolveInterrupted) or None.\n
+        Memory usage and cancellation are slower to check, so they are only checked every check_interval expanded nodes.
+        """
+
+        if max_nodes != None and count >= max_nodes:
+            return "max_nodes"
+        elif deadline != None and time.time() >= deadline:
+            return "deadline"
+        elif expanded % self.check_interval == 0:
+            if cancel_token != None and cancel_token.is_set():
+                return "cancelled"
+            elif max_memory != None and get_memory_usage() >= max_memory:
+                return "max_memory"
+        return None
 
     def get_start_state(self) -> State:
         """Placeholder method for generating the starting state object."""
@@ -313,6 +545,11 @@ class AStarSolver:
 
         return True
 
+    def is_reachable(self) -> bool:
+        """Placeholder method for checking whether the goal can be reached, before the search starts."""
+
+        return True
+
     def update(self):
         """Placeholder update method."""
 
@@ -354,6 +591,11 @@ class StringSolver(AStarSolver):
                 return False
         return True
 
+    def is_reachable(self) -> bool:
+        """Every ordering of the goal's letters can be reached with swaps, so this is the same check as validate."""
+
+        return self.validate()
+
 
 class Movement2DSolver(AStarSolver):
     """
@@ -374,6 +616,13 @@ class Movement2DSolver(AStarSolver):
             goal), allowed_states, forbidden_states, visited_queue)
         self.diagonal_enabled = diagonal_enabled
         self.start_state = self.get_start_state()
+        # If this is set to a AStar_components.ComponentIndex of the map, queries between unconnected tiles are rejected without searching
+        self.components = None
+
+    def is_reachable(self) -> bool:
+        """Returns False if the component index shows the start and goal aren't connected."""
+
+        return self.components == None or self.components.is_connected(self.start, self.goal)
 
     def get_start_state(self) -> State2DMovement:
         """Get the starting state object for this solver."""
@@ -381,6 +630,311 @@ class Movement2DSolver(AStarSolver):
         return State2DMovement(self.start, 0, self.start, self.goal, self.diagonal_enabled)
 
 
+class StringEncoder(object):
+    """
+    Encodes strings made up of the characters of a goal string as compact integers.
+        How to use:
+            encode(value) packs a string into an integer using the fewest bits per character that fit the goal's alphabet.
+            rank(code) gives the index of a packed string among every ordering of the goal's characters (from 0 to get_permutation_count() - 1),
+            which can be used to index flat arrays. decode and unrank reverse them.
+        Init parameters:
+            goal (str) - The goal string, every encoded string must be made up of the same characters.
+    """
+
+    def __init__(self, goal: str):
+
+        self.goal = goal
+        self.length = len(goal)
+        self.alphabet = sorted(set(goal))
+        self.symbols = {char: num for num, char in enumerate(self.alphabet)}
+        self.counts = [goal.count(char) for char in self.alphabet]
+        self.bits = max(1, (len(self.alphabet) - 1).bit_length())
+        self.mask = (1 << self.bits) - 1
+        # The bit offset of each position in the string
+        self.shifts = [i * self.bits for i in range(self.length)]
+
+    def encode(self, value: str) -> int:
+        """Pack a string into an integer."""
+
+        code = 0
+        for i in range(len(value)):
+            code |= self.symbols[value[i]] << self.shifts[i]
+        return code
+
+    def decode(self, code: int) -> str:
+        """Unpack an integer into a string."""
+
+        return "".join(self.alphabet[symbol] for symbol in self.to_symbols(code))
+
+    def to_symbols(self, code: int) -> List[int]:
+        """Unpack an integer into a list of character numbers (indexes into .alphabet)."""
+
+        return [(code >> shift) & self.mask for shift in self.shifts]
+
+    def swap(self, code: int, i: int, x: int) -> int:
+        """Returns the code of the string with the characters at positions i and x swapped."""
+
+        diff = ((code >> self.shifts[i]) ^ (code >> self.shifts[x])) & self.mask
+        return code ^ (diff << self.shifts[i]) ^ (diff << self.shifts[x])
+
+    def get_permutation_count(self) -> int:
+        """Returns the number of distinct orderings of the goal's characters."""
+
+        total = 1
+        placed = 0
+        for count in self.counts:
+            for num in range(1, count + 1):
+                placed += 1
+                total = total * placed // num
+        return total
+
+    def rank(self, code: int) -> int:
+        """Returns the index of the packed string among every ordering of the goal's characters."""
+
+        counts = self.counts[:]
+        remaining = self.get_permutation_count()
+        rank = 0
+        for n, symbol in zip(range(self.length, 0, -1), self.to_symbols(code)):
+            # Count the orderings which have a lower character at this position
+            for lower in range(symbol):
+                if counts[lower]:
+                    rank += remaining * counts[lower] // n
+            remaining = remaining * counts[symbol] // n
+            counts[symbol] -= 1
+        return rank
+
+    def unrank(self, rank: int) -> int:
+        """Returns the packed string with the given rank."""
+
+        counts = self.counts[:]
+        remaining = self.get_permutation_count()
+        code = 0
+        for n, shift in zip(range(self.length, 0, -1), self.shifts):
+            for symbol in range(len(counts)):
+                if not counts[symbol]:
+                    continue
+                block = remaining * counts[symbol] // n
+                if rank < block:
+                    break
+                rank -= block
+            code |= symbol << shift
+            remaining = block
+            counts[symbol] -= 1
+        return code
+
+
+class RankedStateTable(object):
+    """
+    Table holding one byte for every ordering of the goal's characters, indexed by the rank of the packed string.
+    Supports the subset of dict operations used by CompactStringSolver, with values from 1 to 255.
+    This trades time for memory, every lookup works out the rank with a Python loop over the string (see StringEncoder.rank),
+    so it is several times slower than a dict but takes one byte per ordering rather than a dict entry per state reached.
+        Init parameters:
+            encoder (StringEncoder) - The encoder used to pack the strings.
+    """
+
+    def __init__(self, encoder: StringEncoder):
+        self.encoder = encoder
+        self.table = bytearray(encoder.get_permutation_count())
+
+    def __contains__(self, code: int) -> bool:
+        return self.table[self.encoder.rank(code)] != 0
+
+    def __getitem__(self, code: int) -> int:
+        return self.table[self.encoder.rank(code)]
+
+    def __setitem__(self, code: int, value: int):
+        self.table[self.encoder.rank(code)] = value
+
+
+class CompactStringSolver(StringSolver):
+    """
+    String solver which stores states as packed integers (see StringEncoder) rather than State objects.
+    For each state reached, only the swap which reached it is kept, so strings and paths are only built when the path is output.
+        Init parameters:
+            start (str) - The starting string.
+            goal (str) - The goal string.
+            dense_limit (int) - If the goal has at most this many orderings, states are recorded in a RankedStateTable
+            (one byte per ordering, but slower to look up) rather than a dict. Set it to 0 to always use a dict, which is faster.
+    """
+
+    def __init__(self, start: str, goal: str, dense_limit: Optional[int] = 2 ** 24):
+        super(CompactStringSolver, self).__init__(start, goal)
+        self.encoder = StringEncoder(self.goal)
+
+        # The goal positions of each character and how many times it occurs, used to calculate the heuristic
+        self.goal_positions = [[] for _ in self.encoder.alphabet]
+        for i, char in enumerate(self.goal):
+            self.goal_positions[self.encoder.symbols[char]].append(i)
+        self.weights = self.encoder.counts
+
+        # Every pair of positions which can be swapped, a state records which of these reached it (offset by 2, 1 marks the start).
+        self.swaps = [(i, x) for i in range(len(self.goal))
+                      for x in range(i + 1, len(self.goal))]
+        if len(self.swaps) > 253:
+            self.dense = False
+        else:
+            self.dense = self.encoder.get_permutation_count() <= dense_limit
+
+    def get_dist(self, symbols: List[int]) -> int:
+        """
+        Calculate the distance heuristic for a list of character numbers.
+        This is the same as StateString.get_dist, how far each character is from its goal position (repeated characters are paired in order),
+        where a character which occurs n times is counted n times.
+        """
+
+        goal_positions = self.goal_positions
+        weights = self.weights
+        dist = 0
+        found = [0] * len(goal_positions)
+        for i, symbol in enumerate(symbols):
+            dist += abs(goal_positions[symbol][found[symbol]] - i) * weights[symbol]
+            found[symbol] += 1
+        return dist
+
+    def begin(self):
+        """
+        Set up the search, this is called by the first call to step (or solve).
+        """
+
+        if not self.is_reachable():
+            raise RuntimeError("No path")
+
+        encoder = self.encoder
+        start = encoder.encode(self.start)
+        self.goal_code = encoder.encode(self.goal)
+        self.reached = RankedStateTable(encoder) if self.dense else {}
+        self.reached[start] = 1
+        self.best = (self.get_dist(encoder.to_symbols(start)), start)
+        self.open_list = [(self.best[0], 0, start)]
+        self.found = start == self.goal_code
+        self.search_started = True
+        self.expanded = 0
+
+    def step(self, max_expansions: Optional[int] = None, max_nodes: Optional[int] = None, max_memory: Optional[int] = None, deadline: Optional[float] = None, cancel_token=None) -> bool:
+        """
+        Carry on the search for at most max_expansions nodes, the search state is kept between calls (see AStarSolver.step).
+        """
+
+        if self.path:
+            return True
+        if not self.search_started:
+            self.begin()
+
+        start_time = time.time()
+        encoder = self.encoder
+        shifts = encoder.shifts
+        goal = self.goal_code
+        reached = self.reached
+        open_list = self.open_list
+        best = self.best
+        count = self.nodes_considered
+        expanded = self.expanded
+        expansions = 0
+
+        try:
+            while open_list and not self.found:
+                if max_expansions != None and expansions >= max_expansions:
+                    return False
+
+                reason = self.check_limits(
+                    count, expanded, max_nodes, max_memory, deadline, cancel_token)
+                if reason:
+                    best_state = StateString(encoder.decode(
+                        best[1]), 0, self.start, self.goal)
+                    best_state.path = self.__build_path(reached, best[1])
+                    raise SolveInterrupted(reason, count, int(
+                        round((self.time_spent + time.time() - start_time) * 1000, 0)), best_state)
+
+                dist, _, code = heapq.heappop(open_list)
+                expanded += 1
+                expansions += 1
+                if dist < best[0]:
+                    best = (dist, code)
+
+                symbols = encoder.to_symbols(code)
+                for swap_num, (i, x) in enumerate(self.swaps):
+                    a = symbols[i]
+                    b = symbols[x]
+                    if a == b:
+                        continue
+
+                    diff = a ^ b
+                    child = code ^ (diff << shifts[i]) ^ (diff << shifts[x])
+                    if child in reached:
+                        continue
+                    reached[child] = swap_num + 2
+                    count += 1
+
+                    if child == goal:
+                        self.found = True
+                        break
+
+                    # Swap the characters in place to work out the heuristic, rather than unpacking the child
+                    symbols[i], symbols[x] = b, a
+                    child_dist = self.get_dist(symbols)
+                    symbols[i], symbols[x] = a, b
+
+                    heapq.heappush(open_list, (child_dist, count, child))
+
+                self.nodes_considered = count
+                self.update()
+        finally:
+            # Save the search state so it can be carried on by the next call
+            self.nodes_considered = count
+            self.expanded = expanded
+            self.best = best
+            self.time_spent += time.time() - start_time
+            self.time_taken = int(round(self.time_spent * 1000, 0))
+
+        if not self.found:
+            raise RuntimeError("No path")
+
+        self.path = self.__build_path(reached, goal)
+        return True
+
+    def get_frontier(self) -> list:
+        """Returns the strings waiting to be expanded (the open list), in no particular order."""
+
+        return [self.encoder.decode(item[2]) for item in self.open_list]
+
+    def __build_path(self, reached, code: int) -> List[str]:
+        """Decode the path to a state by undoing the swaps which reached it."""
+
+        path = [code]
+        while reached[code] != 1:
+            i, x = self.swaps[reached[code] - 2]
+            code = self.encoder.swap(code, i, x)
+            path.append(code)
+        path.reverse()
+        return [self.encoder.decode(step) for step in path]
+
+
+def round_robin(solvers: List[AStarSolver], max_expansions: Optional[int] = 100):
+    """
+    Run several solvers on one thread, giving each max_expansions nodes in turn.
+    Yields (solver, result) as each solver finishes, where result is the path or the exception the solver raised.\n
+    Every solver must support step (see AStarSolver.can_step), that is the State based solvers and those with a step of their own
+    (such as CompactStringSolver, AStar_graph.GraphSolver, AStar_rsr.RSRSolver and AStar_ch.CHSolver). Otherwise a TypeError is raised.
+    """
+
+    solvers = list(solvers)
+    for solver in solvers:
+        if not solver.can_step():
+            raise TypeError(type(solver).__name__ +
+                            " has its own solve method and doesn't support step, so it can't be run by round_robin")
+    while solvers:
+        for solver in solvers[:]:
+            try:
+                if not solver.step(max_expansions):
+                    continue
+                result = solver.path
+            except Exception as e:
+                result = e
+            solvers.remove(solver)
+            yield solver, result
+
+
 def StringSolver_example():
     goal = """Despacito"""
     temp = list(goal)
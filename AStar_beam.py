@@ -0,0 +1,212 @@
+import heapq
+import math
+import time
+import AStar
+from AStar_parallel import get_swap_lower_bound
+from typing import Optional
+
+
+class BeamStringSolver(AStar.StringSolver):
+    """
+    String solver using beam search, the search is done one depth (number of swaps) at a time
+    and only the width best states of each depth are kept, so time and memory grow with width x depth.
+    States are ranked by swaps so far plus a lower bound on the swaps left (see AStar_parallel.get_swap_lower_bound), then by the distance heuristic (see StateString).
+    Beam search returns the first path found, which may not be the shortest. When a depth has more than width states, beam stack search
+    saves the rest as a range on a stack and searches them later by backtracking. It keeps improving its path until it is the shortest
+    (so a deadline can be used to stop it early, see solve).
+    After solving, .lower_bound is the fewest swaps the path could possibly have and .gap is how many more swaps the path has than it.
+        Init parameters:
+            start (str) - The starting string.
+            goal (str) - The goal string.
+            width (int) - The number of states kept at each depth.
+            beam_stack (bool) - Whether to use beam stack search rather than beam search.
+    """
+
+    def __init__(self, start: str, goal: str, width: Optional[int] = 100, beam_stack: Optional[bool] = False):
+        super(BeamStringSolver, self).__init__(start, goal)
+        if width < 1:
+            raise Exception("Invalid inputs")
+
+        self.width = width
+        self.beam_stack = beam_stack
+        self.lower_bound = get_swap_lower_bound(self.start, self.goal)
+        self.gap = None
+        # Whether the path is known to be the shortest
+        self.optimal = False
+        self.depth = 0
+
+    def solve(self, max_nodes: Optional[int] = None, max_memory: Optional[int] = None, deadline: Optional[float] = None, cancel_token=None):
+        """
+        Creates a solution on how to get from the start, to the goal (see AStarSolver.solve for the parameters).\n
+        If a limit stops a beam stack search after it has found a path, the best path so far is the .best_state.path of the SolveInterrupted exception.
+        """
+
+        self.start_time = time.time()
+        self.nodes_considered = 0
+        self.expanded = 0
+        self.depth = 0
+        self.best_state = self.get_start_state()
+
+        if self.start == self.goal:
+            goal_state = self.best_state
+        elif self.beam_stack:
+            goal_state = self.__beam_stack_search(
+                max_nodes, max_memory, deadline, cancel_token)
+        else:
+            goal_state = self.__beam_search(
+                max_nodes, max_memory, deadline, cancel_token)
+        self.time_taken = int(round((time.time() - self.start_time) * 1000, 0))
+
+        self.path = goal_state.path
+        self.gap = len(self.path) - 1 - self.lower_bound
+        if self.gap == 0:
+            self.optimal = True
+        return self.path
+
+    def __check(self, max_nodes, max_memory, deadline, cancel_token):
+        """Raise SolveInterrupted if one of the limits has been reached."""
+
+        reason = self.check_limits(
+            self.nodes_considered, self.expanded, max_nodes, max_memory, deadline, cancel_token)
+        if reason:
+            self.time_taken = int(
+                round((time.time() - self.start_time) * 1000, 0))
+            raise AStar.SolveInterrupted(
+                reason, self.nodes_considered, self.time_taken, self.best_state)
+
+    def __expand(self, state: AStar.StateString, excluded: set, max_nodes, max_memory, deadline, cancel_token) -> list:
+        """Returns the children of a state which aren't in the excluded set, the parent doesn't keep them."""
+
+        self.__check(max_nodes, max_memory, deadline, cancel_token)
+        self.expanded += 1
+        state.create_children(excluded)
+        children = state.children
+        state.children = []
+        self.nodes_considered += len(children)
+        self.update()
+        return children
+
+    def __beam_search(self, max_nodes, max_memory, deadline, cancel_token) -> AStar.StateString:
+        """Search with a beam of the given width, returns the goal state."""
+
+        layer = [self.best_state]
+        # The states kept so far (at most width per depth), they aren't generated again
+        kept = {self.start}
+
+        while layer:
+            self.depth += 1
+            candidates = {}
+            for state in layer:
+                for child in self.__expand(state, kept, max_nodes, max_memory, deadline, cancel_token):
+                    if child.value == self.goal:
+                        return child
+                    if not child.value in candidates:
+                        candidates[child.value] = (get_swap_lower_bound(
+                            child.value, self.goal), child.dist, child.value), child
+
+            # Keep the best of the children (a partial sort, the rest are never ordered)
+            layer = [child for _, child in heapq.nsmallest(
+                self.width, candidates.values(), key=lambda item: item[0])]
+            kept.update(state.value for state in layer)
+            if layer and layer[0].h < self.best_state.h:
+                self.best_state = layer[0]
+
+        raise RuntimeError("No path")
+
+    def __beam_stack_search(self, max_nodes, max_memory, deadline, cancel_token) -> AStar.StateString:
+        """Search with a beam stack of the given width, returns the goal state of the shortest path."""
+
+        goal = self.goal
+        best_goal = None
+        upper_bound = math.inf
+
+        # layers[depth] holds the states kept at that depth, ranges[depth] is the range of keys of their children being searched,
+        # as [lowest, highest) where None means there is no limit. Keys are (swaps + lower bound, heuristic, value), so no two states share one.
+        layers = [[self.best_state]]
+        ranges = [[None, None]]
+        on_stack = {self.start}
+
+        while ranges:
+            depth = len(layers) - 1
+            lowest, highest = ranges[depth]
+            self.depth = max(self.depth, depth + 1)
+
+            candidates = {}
+            for state in layers[depth]:
+                for child in self.__expand(state, on_stack, max_nodes, max_memory, deadline, cancel_token):
+                    f = depth + 1 + get_swap_lower_bound(child.value, goal)
+                    if f >= upper_bound:
+                        continue
+                    if child.value == goal:
+                        # A shorter path, the search carries on until it is known that there isn't one shorter still
+                        upper_bound = f
+                        best_goal = child
+                        self.best_state = child
+                        continue
+
+                    key = (f, child.dist, child.value)
+                    if (lowest != None and key < lowest) or (highest != None and key >= highest):
+                        continue
+                    if not child.value in candidates or key < candidates[child.value][0]:
+                        candidates[child.value] = (key, child)
+
+            # Keep the best width children, the first one dropped marks where the next range for this depth starts
+            chosen = heapq.nsmallest(
+                self.width + 1, (item for item in candidates.values() if item[0][0] < upper_bound), key=lambda item: item[0])
+            if len(chosen) > self.width:
+                ranges[depth][1] = chosen[self.width][0]
+                chosen = chosen[:self.width]
+
+            if chosen:
+                layers.append([child for _, child in chosen])
+                ranges.append([None, None])
+                on_stack.update(child.value for child in layers[-1])
+                if best_goal == None and chosen[0][1].h < self.best_state.h:
+                    self.best_state = chosen[0][1]
+                continue
+
+            # Backtrack to the deepest depth which still has children left to search
+            while ranges:
+                depth = len(layers) - 1
+                highest = ranges[depth][1]
+                if highest != None and highest[0] < upper_bound:
+                    ranges[depth] = [highest, None]
+                    break
+                ranges.pop()
+                if depth > 0:
+                    on_stack.difference_update(
+                        state.value for state in layers[depth])
+                    layers.pop()
+
+        if best_goal == None:
+            raise RuntimeError("No path")
+        self.optimal = True
+        return best_goal
+
+
+def BeamStringSolver_example():
+    import random
+
+    goal = "the quick brown fox"
+    letters = list(goal)
+    random.shuffle(letters)
+    start = "".join(letters)
+
+    for width in (1, 10, 100):
+        a = BeamStringSolver(start, goal, width)
+        a.solve()
+        print("Beam width " + str(width) + ", Swaps: " + str(len(a.path) - 1) + ", Lower bound: " + str(a.lower_bound) +
+              ", Gap: " + str(a.gap) + ", Time Taken: " + str(a.time_taken) + ", Nodes Considered: " + str(a.nodes_considered))
+
+    # Beam stack search keeps looking for a shorter path until the deadline
+    a = BeamStringSolver(start, goal, 10, beam_stack=True)
+    try:
+        a.solve(deadline=time.time() + 5)
+        print("Beam stack, Shortest path: " + str(len(a.path) - 1) + " swaps")
+    except AStar.SolveInterrupted as e:
+        print("Beam stack, Best path after " + str(e.time_taken) + "ms: " +
+              str(len(e.best_state.path) - 1) + " swaps, Lower bound: " + str(a.lower_bound))
+
+
+if __name__ == "__main__":
+    BeamStringSolver_example()
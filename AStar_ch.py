@@ -0,0 +1,365 @@
+import heapq
+import math
+import struct
+import time
+import AStar
+import AStar_graph
+from array import array
+from typing import Optional, List, Tuple
+
+# File format
+# A hierarchy file is a header followed by the upward forward graph and then the upward backward graph, both in CSR form.
+#   Header: magic (4 bytes), version (uint16), padding (uint16), node count, grid width (0 for general graphs),
+#   forward edge count and backward edge count (all int64), little endian.
+#   Each graph is stored as offsets (int64, node count + 1), targets (int32), weights (float64) and middles (int32, -1 for original edges).
+
+MAGIC = b"ASCH"
+VERSION = 1
+HEADER = struct.Struct("<4sHHqqqq")
+
+
+class ContractionHierarchy(object):
+    """
+    Contraction hierarchy of a static graph, answers shortest path queries with a bidirectional search that only moves up the hierarchy.
+        How to use:
+            Build one from a graph with ContractionHierarchy.build (or from_grid for grid maps), this is slow but only has to be done once.
+            Save it with .save and load it again with ContractionHierarchy.load, then answer queries with .query or CHSolver.
+        Init parameters:
+            node_count (int) - The number of nodes in the graph.
+            forward (tuple) - The (offsets, targets, weights, middles) arrays of the edges leading up the hierarchy.
+            backward (tuple) - The same arrays for edges leading down the hierarchy, stored at their target (so they are searched backwards).
+            width (int) - The width of the grid the hierarchy was built from, or 0 for general graphs.
+    """
+
+    def __init__(self, node_count: int, forward: Tuple[array, array, array, array], backward: Tuple[array, array, array, array], width: Optional[int] = 0):
+
+        self.node_count = node_count
+        self.forward = forward
+        self.backward = backward
+        self.width = width
+
+    @classmethod
+    def build(cls, graph: AStar_graph.CSRGraph, width: Optional[int] = 0, witness_limit: Optional[int] = 64):
+        """
+        Contract every node of a graph, adding shortcut edges so that shortest paths are kept.
+        Nodes are contracted in order of edge difference (shortcuts added minus edges removed) plus the number of contracted neighbours.
+        witness_limit is the number of nodes a witness search may settle, lower values build faster but add more shortcuts.
+        """
+
+        node_count = graph.node_count
+
+        # out_edges[u][w] and in_edges[w][u] hold the (cost, middle node) of the cheapest edge from u to w, middle is -1 for original edges.
+        out_edges = [{} for _ in range(node_count)]
+        in_edges = [{} for _ in range(node_count)]
+        for u in range(node_count):
+            for w, cost in graph.get_edges(u):
+                if w != u and (w not in out_edges[u] or cost < out_edges[u][w][0]):
+                    out_edges[u][w] = (cost, -1)
+                    in_edges[w][u] = (cost, -1)
+
+        contracted = bytearray(node_count)
+        contracted_neighbours = array("i", [0]) * node_count
+        rank = array("i", [0]) * node_count
+
+        def witness_search(source: int, skip: int, limit: float, targets: set) -> dict:
+            """Limited Dijkstra search from source which avoids skip and contracted nodes."""
+
+            dist = {source: 0}
+            open_list = [(0, source)]
+            settled = 0
+            remaining = len(targets)
+            while open_list:
+                d, node = heapq.heappop(open_list)
+                if d > dist[node]:
+                    continue
+                if d > limit or settled >= witness_limit:
+                    break
+                settled += 1
+                if node in targets:
+                    remaining -= 1
+                    if not remaining:
+                        break
+                for target, (cost, _) in out_edges[node].items():
+                    if target == skip or contracted[target]:
+                        continue
+                    target_d = d + cost
+                    if target_d < dist.get(target, math.inf):
+                        dist[target] = target_d
+                        heapq.heappush(open_list, (target_d, target))
+            return dist
+
+        def get_shortcuts(node: int) -> Tuple[list, int]:
+            """Returns the shortcuts needed to contract a node, and the number of edges contracting it removes."""
+
+            incoming = [(u, cost) for u, (cost, _) in in_edges[node].items()
+                        if not contracted[u]]
+            outgoing = [(w, cost) for w, (cost, _) in out_edges[node].items()
+                        if not contracted[w]]
+            shortcuts = []
+            for u, in_cost in incoming:
+                targets = {w: in_cost + out_cost for w,
+                           out_cost in outgoing if w != u}
+                if not targets:
+                    continue
+                dist = witness_search(u, node, max(
+                    targets.values()), set(targets))
+                for w, cost in targets.items():
+                    if dist.get(w, math.inf) > cost:
+                        shortcuts.append((u, w, cost))
+            return shortcuts, len(incoming) + len(outgoing)
+
+        def get_priority(node: int) -> int:
+            shortcuts, removed = get_shortcuts(node)
+            return len(shortcuts) - removed + contracted_neighbours[node]
+
+        queue = [(get_priority(node), node) for node in range(node_count)]
+        heapq.heapify(queue)
+        order = 0
+        while queue:
+            _, node = heapq.heappop(queue)
+
+            # Priorities go out of date as neighbours are contracted, so recalculate it before contracting (lazy updates).
+            shortcuts, removed = get_shortcuts(node)
+            priority = len(shortcuts) - removed + contracted_neighbours[node]
+            if queue and priority > queue[0][0]:
+                heapq.heappush(queue, (priority, node))
+                continue
+
+            for u, w, cost in shortcuts:
+                if w not in out_edges[u] or cost < out_edges[u][w][0]:
+                    out_edges[u][w] = (cost, node)
+                    in_edges[w][u] = (cost, node)
+
+            contracted[node] = 1
+            rank[node] = order
+            order += 1
+            for neighbour in list(out_edges[node]) + list(in_edges[node]):
+                contracted_neighbours[neighbour] += 1
+
+        # Split the edges into those leading up the hierarchy from their source, and those leading down to their target.
+        forward = [[] for _ in range(node_count)]
+        backward = [[] for _ in range(node_count)]
+        for u in range(node_count):
+            for w, (cost, middle) in out_edges[u].items():
+                if rank[u] < rank[w]:
+                    forward[u].append((w, cost, middle))
+                else:
+                    backward[w].append((u, cost, middle))
+
+        return cls(node_count, cls.__to_csr(forward), cls.__to_csr(backward), width)
+
+    @classmethod
+    def from_grid(cls, grid_map, diagonal_enabled: Optional[bool] = False, witness_limit: Optional[int] = 64):
+        """Build a hierarchy from a grid map (such as an AStar_map.GridMap), see CSRGraph.from_grid for the costs used."""
+
+        graph = AStar_graph.CSRGraph.from_grid(grid_map, diagonal_enabled)
+        return cls.build(graph, grid_map.width, witness_limit)
+
+    @staticmethod
+    def __to_csr(edges: list) -> Tuple[array, array, array, array]:
+        """Convert a list of (target, cost, middle) lists into CSR arrays."""
+
+        offsets = array("q", [0])
+        targets = array("i")
+        weights = array("d")
+        middles = array("i")
+        for node_edges in edges:
+            for target, cost, middle in node_edges:
+                targets.append(target)
+                weights.append(cost)
+                middles.append(middle)
+            offsets.append(len(targets))
+        return (offsets, targets, weights, middles)
+
+    def save(self, path: str):
+        """Save the hierarchy to a file."""
+
+        with open(path, "wb") as ch_file:
+            ch_file.write(HEADER.pack(MAGIC, VERSION, 0, self.node_count, self.width, len(
+                self.forward[1]), len(self.backward[1])))
+            for arrays in (self.forward, self.backward):
+                for values in arrays:
+                    ch_file.write(values.tobytes())
+
+    @classmethod
+    def load(cls, path: str):
+        """Load a hierarchy saved with .save."""
+
+        with open(path, "rb") as ch_file:
+            data = ch_file.read()
+
+        if len(data) < HEADER.size:
+            raise ValueError("Not a contraction hierarchy file: " + str(path))
+        magic, version, _, node_count, width, forward_count, backward_count = HEADER.unpack_from(
+            data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a contraction hierarchy file: " + str(path))
+
+        position = HEADER.size
+
+        def read_array(typecode: str, length: int) -> array:
+            nonlocal position
+            values = array(typecode)
+            size = values.itemsize * length
+            if position + size > len(data):
+                raise ValueError(
+                    "Contraction hierarchy file is truncated: " + str(path))
+            values.frombytes(data[position:position + size])
+            position += size
+            return values
+
+        graphs = []
+        for count in (forward_count, backward_count):
+            graphs.append((read_array("q", node_count + 1), read_array(
+                "i", count), read_array("d", count), read_array("i", count)))
+
+        return cls(node_count, graphs[0], graphs[1], width)
+
+    def query(self, start: int, goal: int) -> Tuple[float, List[int], int]:
+        """
+        Returns the (cost, path, nodes reached) of the shortest path between two nodes, the path is a list of node ids.
+        Raises a RuntimeError if there is no path.
+        """
+
+        if not (0 <= start < self.node_count and 0 <= goal < self.node_count):
+            raise ValueError("Node outside of the graph")
+
+        # Search up the hierarchy from both ends, index 0 is the forward search and 1 is the backward search.
+        graphs = (self.forward, self.backward)
+        dists = ({start: 0}, {goal: 0})
+        parents = ({start: -1}, {goal: -1})
+        open_lists = ([(0, start)], [(0, goal)])
+        best = math.inf
+        meeting = -1
+
+        while open_lists[0] or open_lists[1]:
+            # Expand whichever search has the lower distance next, each search stops once it can't improve on the best path.
+            side = 0 if not open_lists[1] or (
+                open_lists[0] and open_lists[0][0][0] <= open_lists[1][0][0]) else 1
+            d, node = heapq.heappop(open_lists[side])
+            if d >= best:
+                open_lists[side].clear()
+                continue
+            if d > dists[side][node]:
+                continue
+
+            other = dists[1 - side].get(node)
+            if other != None and d + other < best:
+                best = d + other
+                meeting = node
+
+            offsets, targets, weights, _ = graphs[side]
+            dist = dists[side]
+            for index in range(offsets[node], offsets[node + 1]):
+                target = targets[index]
+                target_d = d + weights[index]
+                if target_d < dist.get(target, math.inf):
+                    dist[target] = target_d
+                    parents[side][target] = node
+                    heapq.heappush(open_lists[side], (target_d, target))
+
+        if meeting == -1:
+            raise RuntimeError("No path")
+
+        # Join the two halves at the meeting node, then unpack the shortcuts.
+        upward = [meeting]
+        while parents[0][upward[-1]] != -1:
+            upward.append(parents[0][upward[-1]])
+        upward.reverse()
+        downward = []
+        node = meeting
+        while parents[1][node] != -1:
+            node = parents[1][node]
+            downward.append(node)
+        nodes = upward + downward
+
+        path = [nodes[0]]
+        for u, w in zip(nodes, nodes[1:]):
+            self.__unpack(u, w, path)
+        return best, path, len(dists[0]) + len(dists[1])
+
+    def __get_middle(self, u: int, w: int) -> int:
+        """Returns the middle node of the edge from u to w (-1 if it is an original edge)."""
+
+        offsets, targets, _, middles = self.forward
+        for index in range(offsets[u], offsets[u + 1]):
+            if targets[index] == w:
+                return middles[index]
+        offsets, targets, _, middles = self.backward
+        for index in range(offsets[w], offsets[w + 1]):
+            if targets[index] == u:
+                return middles[index]
+        raise RuntimeError("Missing edge " + str(u) + " -> " + str(w))
+
+    def __unpack(self, u: int, w: int, path: List[int]):
+        """Append the original nodes of the edge from u to w (excluding u) to path."""
+
+        # Use a stack rather than recursion, shortcuts can be nested very deeply.
+        stack = [(u, w)]
+        while stack:
+            u, w = stack.pop()
+            middle = self.__get_middle(u, w)
+            if middle == -1:
+                path.append(w)
+            else:
+                stack.append((middle, w))
+                stack.append((u, middle))
+
+
+class CHSolver(AStar.AStarSolver):
+    """
+    Solver which answers queries using a ContractionHierarchy.
+    If the hierarchy was built from a grid, start and goal are (x, y) coordinates and the path is a list of coordinates,
+    otherwise they are node ids.
+        Init parameters:
+            hierarchy (ContractionHierarchy) - The preprocessed hierarchy.
+            start - The starting node.
+            goal - The goal node.
+    """
+
+    def __init__(self, hierarchy: ContractionHierarchy, start, goal):
+        super(CHSolver, self).__init__(start, goal)
+        self.hierarchy = hierarchy
+        if not self.validate():
+            raise Exception("Invalid inputs")
+        self.cost = 0
+
+    def validate(self) -> bool:
+        """Method for validating the starting information given to the solver, coordinates off the grid would wrap onto another tile."""
+
+        return self.__is_valid(self.start) and self.__is_valid(self.goal)
+
+    def __is_valid(self, value) -> bool:
+        width = self.hierarchy.width
+        if width:
+            return 0 <= value[0] < width and 0 <= value[1] < self.hierarchy.node_count // width
+        return 0 <= value < self.hierarchy.node_count
+
+    def __to_node(self, value) -> int:
+        if self.hierarchy.width:
+            return value[1] * self.hierarchy.width + value[0]
+        return value
+
+    def __from_node(self, node: int):
+        if self.hierarchy.width:
+            return (node % self.hierarchy.width, node // self.hierarchy.width)
+        return node
+
+    def step(self, max_expansions: Optional[int] = None, max_nodes: Optional[int] = None, max_memory: Optional[int] = None, deadline: Optional[float] = None, cancel_token=None) -> bool:
+        """
+        Answer the query (see AStarSolver.step), the solve and step limits are accepted but ignored.
+        The query is too short to be worth pausing or interrupting, so the first call always finishes it.
+        The total cost of the path is stored in the .cost attribute.
+        """
+
+        if self.path:
+            return True
+
+        start_time = time.time()
+        try:
+            self.cost, path, self.nodes_considered = self.hierarchy.query(
+                self.__to_node(self.start), self.__to_node(self.goal))
+        finally:
+            self.time_taken = int(round((time.time() - start_time) * 1000, 0))
+        self.path = [self.__from_node(node) for node in path]
+        return True
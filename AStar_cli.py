@@ -0,0 +1,298 @@
+#!/usr/bin/python3
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+import AStar
+from typing import Optional, List
+
+# Command line interface for running batches of solves without a display.
+# Queries are read from a file (or stdin), one per line, and the results are written as JSON lines.
+#   String queries are JSON objects {"start": "...", "goal": "..."} or two whitespace separated strings.
+#   Grid queries are JSON objects {"start": [x, y], "goal": [x, y]} or four whitespace separated integers "x1 y1 x2 y2".
+
+STRING_ALGORITHMS = ["astar", "compact", "hda",
+                     "external", "pdb", "beam", "beamstack"]
+GRID_ALGORITHMS = ["astar", "graph", "ch", "rsr"]
+
+# Settings for the solves run by this process, set by init_worker.
+worker_settings = {}
+
+
+def parse_query(line: str, mode: str) -> dict:
+    """Parse one line of input into a {"start", "goal"} dict."""
+
+    line = line.strip()
+    if line.startswith("{"):
+        query = json.loads(line)
+    else:
+        fields = line.split()
+        if mode == "string":
+            query = {"start": fields[0], "goal": fields[1]}
+        else:
+            query = {"start": [int(fields[0]), int(fields[1])],
+                     "goal": [int(fields[2]), int(fields[3])]}
+
+    if mode == "grid":
+        query["start"] = tuple(query["start"])
+        query["goal"] = tuple(query["goal"])
+    return query
+
+
+def read_queries(input_file, mode: str):
+    """Yields (line number, query or exception) for each non blank line of the input."""
+
+    for num, line in enumerate(input_file, 1):
+        if not line.strip() or line.startswith("#"):
+            continue
+        try:
+            yield num, parse_query(line, mode)
+        except (ValueError, IndexError, KeyError, TypeError) as e:
+            yield num, ValueError("Invalid query: " + str(e))
+
+
+def init_worker(settings: dict):
+    """
+    Set up a worker process, grid maps (and the structures built from them) are loaded once per worker rather than once per query.
+    """
+
+    worker_settings.clear()
+    worker_settings.update(settings)
+
+    # Pattern databases are kept for the life of the worker, so each is only built (or loaded) once
+    if settings["algorithm"] == "pdb":
+        worker_settings["pdb cache"] = {}
+
+    if settings["mode"] == "grid":
+        import AStar_map
+        worker_settings["grid map"] = AStar_map.GridMap(settings["map"])
+
+        # Queries between unconnected tiles are rejected without searching (used by the astar and rsr solvers)
+        if settings["algorithm"] in ("astar", "rsr"):
+            import AStar_components
+            worker_settings["components"] = AStar_components.ComponentIndex(
+                worker_settings["grid map"], settings["diagonal"])
+
+        if settings["algorithm"] == "graph":
+            import AStar_graph
+            worker_settings["graph"] = AStar_graph.CSRGraph.from_grid(
+                worker_settings["grid map"], settings["diagonal"])
+            worker_settings["graph solver"] = None
+        elif settings["algorithm"] == "ch":
+            import AStar_ch
+            worker_settings["hierarchy"] = AStar_ch.ContractionHierarchy.load(
+                settings["hierarchy"])
+        elif settings["algorithm"] == "rsr":
+            import AStar_rsr
+            worker_settings["reduction"] = AStar_rsr.RectangleReduction(
+                worker_settings["grid map"], settings["diagonal"])
+
+
+def create_solver(query: dict):
+    """Create the solver for a query using the settings of this worker."""
+
+    algorithm = worker_settings["algorithm"]
+
+    if worker_settings["mode"] == "string":
+        if algorithm == "compact":
+            return AStar.CompactStringSolver(query["start"], query["goal"])
+        elif algorithm == "hda":
+            import AStar_parallel
+            return AStar_parallel.HDAStringSolver(query["start"], query["goal"], worker_settings["workers"])
+        elif algorithm == "external":
+            import AStar_external
+            return AStar_external.ExternalStringSolver(query["start"], query["goal"])
+        elif algorithm == "pdb":
+            import AStar_pdb
+            heuristic = AStar_pdb.PatternHeuristic.create(
+                query["goal"], directory=worker_settings["pdb directory"], cache=worker_settings["pdb cache"])
+            return AStar_pdb.PDBStringSolver(query["start"], query["goal"], heuristic)
+        elif algorithm in ("beam", "beamstack"):
+            import AStar_beam
+            return AStar_beam.BeamStringSolver(query["start"], query["goal"], worker_settings["beam width"], algorithm == "beamstack")
+        return AStar.StringSolver(query["start"], query["goal"])
+
+    grid_map = worker_settings["grid map"]
+    if algorithm == "graph":
+        import AStar_graph
+        # Coordinates off the map would wrap onto another tile when turned into node ids
+        if not (grid_map.in_bounds(query["start"]) and grid_map.in_bounds(query["goal"])):
+            raise Exception("Invalid inputs")
+        width = grid_map.width
+        start = query["start"][1] * width + query["start"][0]
+        goal = query["goal"][1] * width + query["goal"][0]
+
+        # One solver is reused for every query, so only the entries touched by the last query are cleared (see GraphSolver.reset)
+        solver = worker_settings["graph solver"]
+        if solver == None:
+            solver = AStar_graph.GraphSolver(
+                worker_settings["graph"], start, goal)
+            worker_settings["graph solver"] = solver
+        else:
+            solver.reset(start, goal)
+        return solver
+    elif algorithm == "ch":
+        import AStar_ch
+        return AStar_ch.CHSolver(worker_settings["hierarchy"], query["start"], query["goal"])
+    elif algorithm == "rsr":
+        import AStar_rsr
+        solver = AStar_rsr.RSRSolver(
+            worker_settings["reduction"], query["start"], query["goal"])
+    else:
+        import AStar_map
+        solver = AStar_map.Movement2DSolver(
+            grid_map, query["start"], query["goal"], worker_settings["diagonal"])
+
+    solver.components = worker_settings["components"]
+    return solver
+
+
+def run_query(job: tuple) -> dict:
+    """Solve one (line number, query) job and return its result as a dict."""
+
+    num, query = job
+    result = {"line": num}
+    if isinstance(query, Exception):
+        result["error"] = str(query)
+        return result
+
+    result["start"] = query["start"]
+    result["goal"] = query["goal"]
+    start_time = time.time()
+    solver = None
+    try:
+        solver = create_solver(query)
+        deadline = None
+        if worker_settings["timeout"]:
+            deadline = start_time + worker_settings["timeout"]
+        path = solver.solve(deadline=deadline)
+
+        if worker_settings["algorithm"] == "graph":
+            width = worker_settings["grid map"].width
+            path = [(node % width, node // width) for node in path]
+
+        result["path"] = path
+        result["cost"] = get_cost(solver, path)
+        if getattr(solver, "gap", None) != None:
+            result["gap"] = solver.gap
+    except Exception as e:
+        result["error"] = str(e)
+
+    result["nodes"] = solver.nodes_considered if solver else 0
+    result["time_ms"] = round((time.time() - start_time) * 1000, 3)
+    return result
+
+
+def get_cost(solver, path: list) -> int:
+    """
+    Returns the cost of a path, swaps for strings and the move costs of AStar_map.get_path_cost for grids.
+    It is worked out from the path the same way for every algorithm, so results from different algorithms can be compared.
+    """
+
+    if worker_settings["mode"] == "string":
+        return len(path) - 1
+    import AStar_map
+    return AStar_map.get_path_cost(worker_settings["grid map"], path)
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Run batches of A* solves without a display, results are written as JSON lines.")
+    parser.add_argument("mode", choices=["string", "grid"],
+                        help="The kind of problem to solve.")
+    parser.add_argument("-i", "--input", default="-",
+                        help="File of queries, one per line (defaults to stdin).")
+    parser.add_argument("-o", "--output", default="-",
+                        help="File to write the results to (defaults to stdout).")
+    parser.add_argument("-a", "--algorithm", default="astar",
+                        help="string: " + ", ".join(STRING_ALGORITHMS) + ". grid: " + ", ".join(GRID_ALGORITHMS) + ".")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="Number of worker processes (for hda, the number of processes used by each solve).")
+    parser.add_argument("-t", "--timeout", type=float, default=None,
+                        help="Seconds allowed for each query.")
+    parser.add_argument("-m", "--map", help="Map file for grid queries (see AStar_map).")
+    parser.add_argument("-d", "--diagonal", action="store_true",
+                        help="Allow diagonal movement on grids.")
+    parser.add_argument("--hierarchy",
+                        help="Contraction hierarchy file for the ch algorithm, it is built from the map if it doesn't exist.")
+    parser.add_argument("--pdb-dir",
+                        help="Directory to keep pattern databases in for the pdb algorithm, so they are built once and reused.")
+    parser.add_argument("--beam-width", type=int, default=100,
+                        help="Number of states kept at each depth for the beam and beamstack algorithms.")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the command line interface, returns the exit code."""
+
+    parser = create_parser()
+    args = parser.parse_args(argv)
+
+    algorithms = STRING_ALGORITHMS if args.mode == "string" else GRID_ALGORITHMS
+    if args.algorithm not in algorithms:
+        parser.error("algorithm must be one of " + ", ".join(algorithms))
+    if args.mode == "grid" and not args.map:
+        parser.error("grid queries need a --map")
+    if args.algorithm == "ch" and not args.hierarchy:
+        parser.error("the ch algorithm needs a --hierarchy file")
+    if args.beam_width < 1:
+        parser.error("--beam-width must be at least 1")
+
+    if args.algorithm == "ch" and not os.path.exists(args.hierarchy):
+        import AStar_map
+        import AStar_ch
+        with AStar_map.GridMap(args.map) as grid_map:
+            AStar_ch.ContractionHierarchy.from_grid(
+                grid_map, args.diagonal).save(args.hierarchy)
+
+    settings = {
+        "mode": args.mode,
+        "algorithm": args.algorithm,
+        "workers": args.workers,
+        "timeout": args.timeout,
+        "map": args.map,
+        "diagonal": args.diagonal,
+        "hierarchy": args.hierarchy,
+        "pdb directory": args.pdb_dir,
+        "beam width": args.beam_width
+    }
+
+    input_file = sys.stdin if args.input == "-" else open(args.input)
+    output_file = sys.stdout if args.output == "-" else open(args.output, "w")
+    failures = 0
+
+    try:
+        jobs = read_queries(input_file, args.mode)
+
+        # hda uses its own worker processes, so its queries are run one at a time.
+        if args.workers > 1 and args.algorithm != "hda":
+            pool = multiprocessing.Pool(
+                args.workers, init_worker, (settings,))
+            results = pool.imap(run_query, jobs, chunksize=4)
+        else:
+            pool = None
+            init_worker(settings)
+            results = map(run_query, jobs)
+
+        for result in results:
+            if "error" in result:
+                failures += 1
+            output_file.write(json.dumps(result) + "\n")
+            output_file.flush()
+
+        if pool:
+            pool.close()
+            pool.join()
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
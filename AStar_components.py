@@ -0,0 +1,193 @@
+import AStar
+from array import array
+from typing import Optional, List, Tuple
+
+# Connectivity index for grid maps.
+# Every passable tile holds a label, and labels are joined into components with a union find (so joining two areas is cheap).
+# Splitting a component can't be done with a union find, so when a wall is added the area cut off is searched and given a new label.
+
+
+class ComponentIndex(object):
+    """
+    Index of which tiles of a grid map are connected, so queries with no path can be rejected without searching.
+    Moves are the same as in Movement2DSolver, so with diagonal movement tiles touching at a corner are connected.
+        How to use:
+            Create it once for a map, keep it up to date with set_tile, and check queries with is_connected.
+        Init parameters:
+            grid_map - The map to index (such as an AStar_map.GridMap or AStar_map.TileGrid).
+            diagonal_enabled (bool) - Whether diagonal movement is permitted.
+            forbidden_states (set) - Any extra locations which are not permitted.
+    """
+
+    def __init__(self, grid_map, diagonal_enabled: Optional[bool] = False, forbidden_states: Optional[set] = set()):
+
+        self.width = grid_map.width
+        self.height = grid_map.height
+        self.diagonal_enabled = diagonal_enabled
+        self.moves = [(move_x, move_y) for move_x, move_y, _ in (
+            AStar.DIAGONAL_MOVES if diagonal_enabled else AStar.STRAIGHT_MOVES)]
+
+        # The label of each tile (-1 for walls) indexed by y * width + x, and the union find parent of each label.
+        self.labels = array("i", [-1]) * (self.width * self.height)
+        self.parents = array("i")
+
+        for y in range(self.height):
+            for x in range(self.width):
+                if grid_map.is_passable((x, y)) and not (x, y) in forbidden_states:
+                    self.labels[y * self.width + x] = -2
+
+        # Label each unlabelled area with a flood fill
+        for index in range(len(self.labels)):
+            if self.labels[index] == -2:
+                self.__flood((index % self.width, index // self.width),
+                             self.__new_label(), lambda label: label == -2)
+
+    def __new_label(self) -> int:
+        """Create a new label, in a component of its own."""
+
+        self.parents.append(len(self.parents))
+        return len(self.parents) - 1
+
+    def find(self, label: int) -> int:
+        """Returns the label of the component a label belongs to."""
+
+        parents = self.parents
+        while parents[label] != label:
+            parents[label] = parents[parents[label]]
+            label = parents[label]
+        return label
+
+    def in_bounds(self, coords: Tuple[int, int]) -> bool:
+        """Returns whether the coordinates are on the map."""
+
+        return 0 <= coords[0] < self.width and 0 <= coords[1] < self.height
+
+    def is_passable(self, coords: Tuple[int, int]) -> bool:
+        """Returns whether the tile at coords can be moved onto."""
+
+        return self.in_bounds(coords) and self.labels[coords[1] * self.width + coords[0]] >= 0
+
+    def get_component(self, coords: Tuple[int, int]) -> int:
+        """Returns the component of a tile, or -1 if it is a wall."""
+
+        if not self.is_passable(coords):
+            return -1
+        return self.find(self.labels[coords[1] * self.width + coords[0]])
+
+    def is_connected(self, start: Tuple[int, int], goal: Tuple[int, int]) -> bool:
+        """Returns whether there is a path between two tiles."""
+
+        component = self.get_component(start)
+        return component != -1 and component == self.get_component(goal)
+
+    def set_tile(self, coords: Tuple[int, int], passable: bool):
+        """Change whether a tile is passable, updating the components."""
+
+        if not self.in_bounds(coords) or self.is_passable(coords) == passable:
+            return
+        index = coords[1] * self.width + coords[0]
+        neighbours = self.__get_neighbours(coords)
+
+        if passable:
+            # Join the components around the tile together
+            components = set(self.get_component(neighbour)
+                             for neighbour in neighbours)
+            label = components.pop() if components else self.__new_label()
+            for component in components:
+                self.parents[component] = label
+            self.labels[index] = label
+            return
+
+        self.labels[index] = -1
+        groups = self.__get_local_groups(coords, neighbours)
+        if len(groups) < 2:
+            # The tiles around the wall are still joined to each other, so nothing can have been cut off
+            return
+
+        # Search out from each group to see if it can still reach an earlier one. If it can't, it has been cut off so its area gets a new label.
+        # The first group keeps the old label.
+        for num in range(1, len(groups)):
+            seed = groups[num][0]
+            if self.get_component(seed) != self.find(self.labels[groups[0][0][1] * self.width + groups[0][0][0]]):
+                # Already given a new label by an earlier search
+                continue
+
+            targets = set()
+            for group in groups[:num]:
+                targets.update(group)
+            visited = self.__search(seed, targets)
+            if visited != None:
+                label = self.__new_label()
+                for visited_index in visited:
+                    self.labels[visited_index] = label
+
+    def __get_neighbours(self, coords: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """Returns the passable tiles which can be moved to from a tile."""
+
+        return [(coords[0] + move_x, coords[1] + move_y) for move_x, move_y in self.moves
+                if self.is_passable((coords[0] + move_x, coords[1] + move_y))]
+
+    def __get_local_groups(self, coords: Tuple[int, int], neighbours: List[Tuple[int, int]]) -> List[List[Tuple[int, int]]]:
+        """Split the neighbours of a tile into groups which are joined to each other without leaving the 3x3 area around it."""
+
+        ring = set((coords[0] + x, coords[1] + y) for x in (-1, 0, 1) for y in (-1, 0, 1)
+                   if (x or y) and self.is_passable((coords[0] + x, coords[1] + y)))
+        groups = []
+        grouped = set()
+        for neighbour in neighbours:
+            if neighbour in grouped:
+                continue
+            group = []
+            stack = [neighbour]
+            grouped.add(neighbour)
+            while stack:
+                tile = stack.pop()
+                if tile in neighbours:
+                    group.append(tile)
+                for move_x, move_y in self.moves:
+                    next_tile = (tile[0] + move_x, tile[1] + move_y)
+                    if next_tile in ring and not next_tile in grouped:
+                        grouped.add(next_tile)
+                        stack.append(next_tile)
+            groups.append(group)
+        return groups
+
+    def __search(self, start: Tuple[int, int], targets: set) -> Optional[List[int]]:
+        """
+        Breadth first search from a tile, stopping as soon as one of the targets is reached (then None is returned).
+        Otherwise the index of every tile reached is returned.
+        """
+
+        width = self.width
+        start_index = start[1] * width + start[0]
+        visited = {start_index}
+        queue = [start]
+        for tile in queue:
+            for move_x, move_y in self.moves:
+                next_tile = (tile[0] + move_x, tile[1] + move_y)
+                if not self.is_passable(next_tile):
+                    continue
+                if next_tile in targets:
+                    return None
+                next_index = next_tile[1] * width + next_tile[0]
+                if not next_index in visited:
+                    visited.add(next_index)
+                    queue.append(next_tile)
+        return list(visited)
+
+    def __flood(self, start: Tuple[int, int], label: int, can_fill):
+        """Give a label to every tile reachable from start whose current label passes can_fill."""
+
+        width = self.width
+        self.labels[start[1] * width + start[0]] = label
+        stack = [start]
+        while stack:
+            tile = stack.pop()
+            for move_x, move_y in self.moves:
+                next_tile = (tile[0] + move_x, tile[1] + move_y)
+                if not self.in_bounds(next_tile):
+                    continue
+                next_index = next_tile[1] * width + next_tile[0]
+                if can_fill(self.labels[next_index]):
+                    self.labels[next_index] = label
+                    stack.append(next_tile)
@@ -0,0 +1,364 @@
+import heapq
+import os
+import shutil
+import tempfile
+import time
+import AStar
+from typing import Optional, List, Iterable, Iterator
+
+# External memory search.
+# States are packed integers (see AStar.StringEncoder) written to disk as fixed size big endian records,
+# so the files sort in the same order as the integers. Every file is written in one go and read back in blocks.
+
+
+class StateFile(object):
+    """
+    File of sorted packed states stored as fixed size records.
+        Init parameters:
+            path (str) - The path of the file.
+            record_size (int) - The number of bytes in each record.
+            block_size (int) - The number of bytes read from or written to the file at once.
+    """
+
+    def __init__(self, path: str, record_size: int, block_size: Optional[int] = 2 ** 20):
+
+        self.path = path
+        self.record_size = record_size
+        # Round the block size down to a whole number of records
+        self.block_size = max(block_size // record_size, 1) * record_size
+        self.bytes_written = 0
+        self.bytes_read = 0
+
+    def write(self, codes: Iterable[int]) -> int:
+        """Write states to the file (replacing its contents) in blocks, returns the number of states written."""
+
+        record_size = self.record_size
+        records_per_block = self.block_size // record_size
+        count = 0
+        block = []
+        with open(self.path, "wb") as state_file:
+            for code in codes:
+                block.append(code.to_bytes(record_size, "big"))
+                if len(block) >= records_per_block:
+                    state_file.write(b"".join(block))
+                    count += len(block)
+                    block = []
+            if block:
+                state_file.write(b"".join(block))
+                count += len(block)
+        self.bytes_written += count * record_size
+        return count
+
+    def __iter__(self) -> Iterator[int]:
+        """Read the states from the file in blocks."""
+
+        if not os.path.exists(self.path):
+            return
+        record_size = self.record_size
+        with open(self.path, "rb") as state_file:
+            while True:
+                block = state_file.read(self.block_size)
+                if not block:
+                    break
+                self.bytes_read += len(block)
+                for start in range(0, len(block), record_size):
+                    yield int.from_bytes(block[start:start + record_size], "big")
+
+    def delete(self):
+        """Remove the file from disk."""
+
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def merge_unique(streams: List[Iterable[int]]) -> Iterator[int]:
+    """Merge sorted streams of states, dropping duplicates."""
+
+    last = None
+    for code in heapq.merge(*streams):
+        if code != last:
+            yield code
+            last = code
+
+
+def subtract(codes: Iterable[int], removed: List[Iterable[int]]) -> Iterator[int]:
+    """Yields the states of a sorted stream which are not in any of the removed sorted streams."""
+
+    removed = iter(merge_unique(removed))
+    current = next(removed, None)
+    for code in codes:
+        while current != None and current < code:
+            current = next(removed, None)
+        if code != current:
+            yield code
+
+
+class ExternalStringSolver(AStar.StringSolver):
+    """
+    String solver which keeps its search on disk, for problems whose states don't fit in memory even when packed.
+    The search is breadth first heuristic search with delayed duplicate detection: states are expanded a whole depth layer at a time,
+    and any child which can't lead to a path of at most the current bound swaps (by the admissible heuristic of AStar_parallel) is dropped.
+    Children are collected in memory until max_buffered_states are held, then sorted and written to a run file.
+    Once the layer is expanded the runs are merged, and duplicates (including any state in the previous two layers) are removed
+    while the next layer is written out. As every swap can be undone, a state can't be reached again any further back, so no closed list is kept.
+    If the bound is too low to reach the goal the search is repeated with a higher bound, so the path returned has the fewest swaps.
+    The path is rebuilt by scanning back through the layer files for a state one swap away from the next step.
+        Init parameters:
+            start (str) - The starting string.
+            goal (str) - The goal string.
+            directory (str) - The directory to create the search files in, defaults to the system temporary directory.
+            max_buffered_states (int) - The number of children held in memory before they are written to disk.
+            block_size (int) - The number of bytes read from or written to a file at once.
+            merge_width (int) - The maximum number of run files merged at once (and so open at once).
+    """
+
+    def __init__(self, start: str, goal: str, directory: Optional[str] = None, max_buffered_states: Optional[int] = 2 ** 20, block_size: Optional[int] = 2 ** 20, merge_width: Optional[int] = 64):
+        super(ExternalStringSolver, self).__init__(start, goal)
+        if max_buffered_states < 1 or merge_width < 2:
+            raise Exception("Invalid inputs")
+
+        self.encoder = AStar.StringEncoder(self.goal)
+        self.directory = directory
+        self.max_buffered_states = max_buffered_states
+        self.block_size = block_size
+        self.merge_width = merge_width
+        self.record_size = max(
+            (self.encoder.bits * self.encoder.length + 7) // 8, 1)
+
+        # Every pair of positions which can be swapped
+        self.swaps = [(i, x) for i in range(len(self.goal))
+                      for x in range(i + 1, len(self.goal))]
+        self.goal_symbols = self.encoder.to_symbols(
+            self.encoder.encode(self.goal))
+
+        self.bound = 0
+        self.stats = {
+            "iterations": 0,
+            "layers": 0,
+            "runs written": 0,
+            "largest layer": 0,
+            "bytes written": 0,
+            "bytes read": 0
+        }
+
+    def get_misplaced(self, symbols: List[int]) -> int:
+        """Returns the number of characters which are not in their goal position."""
+
+        misplaced = 0
+        for symbol, goal_symbol in zip(symbols, self.goal_symbols):
+            if symbol != goal_symbol:
+                misplaced += 1
+        return misplaced
+
+    def solve(self, max_nodes: Optional[int] = None, max_memory: Optional[int] = None, deadline: Optional[float] = None, cancel_token=None):
+        """
+        Creates a solution on how to get from the start, to the goal (see AStarSolver.solve for the parameters).\n
+        The search files are deleted once the solve finishes. The amount of disk I/O is recorded in the .stats attribute.
+        """
+
+        start_time = time.time()
+        start = self.encoder.encode(self.start)
+        goal = self.encoder.encode(self.goal)
+        self.nodes_considered = 0
+        self.expanded = 0
+
+        if start == goal:
+            self.path = [self.start]
+            return self.path
+
+        self.__work_dir = tempfile.mkdtemp(
+            prefix="astar_", dir=self.directory)
+        try:
+            # Start with the heuristic of the start as the bound, raising it to the lowest dropped f value until the goal is found.
+            bound = (self.get_misplaced(
+                self.encoder.to_symbols(start)) + 1) // 2
+            while True:
+                self.bound = bound
+                self.stats["iterations"] += 1
+                layers, bound = self.__search(
+                    start, goal, bound, start_time, max_nodes, max_memory, deadline, cancel_token)
+                if layers != None:
+                    break
+                if bound == None:
+                    raise RuntimeError("No path")
+
+            self.path = [self.encoder.decode(code)
+                         for code in self.__build_path(layers, goal)]
+        finally:
+            shutil.rmtree(self.__work_dir, ignore_errors=True)
+            self.time_taken = int(round((time.time() - start_time) * 1000, 0))
+
+        return self.path
+
+    def __new_file(self, name: str) -> StateFile:
+        """Create a StateFile in the working directory."""
+
+        return StateFile(os.path.join(self.__work_dir, name), self.record_size, self.block_size)
+
+    def __close_file(self, state_file: StateFile, delete: Optional[bool] = True):
+        """Add the I/O done on a file to the stats, and optionally delete it."""
+
+        self.stats["bytes written"] += state_file.bytes_written
+        self.stats["bytes read"] += state_file.bytes_read
+        state_file.bytes_written = 0
+        state_file.bytes_read = 0
+        if delete:
+            state_file.delete()
+
+    def __search(self, start: int, goal: int, bound: int, start_time: float, max_nodes, max_memory, deadline, cancel_token):
+        """
+        Search every layer up to the bound.
+        Returns (layer files, None) if the goal is reached, otherwise (None, the lowest f value dropped) where that is None if nothing was dropped.
+        """
+
+        encoder = self.encoder
+        shifts = encoder.shifts
+        goal_symbols = self.goal_symbols
+        swaps = self.swaps
+
+        layers = [self.__new_file("layer_0")]
+        layers[0].write([start])
+        next_bound = None
+
+        for depth in range(bound):
+            child_f_base = depth + 1
+            runs = []
+            buffer = set()
+            found = False
+
+            for code in layers[depth]:
+                reason = self.check_limits(
+                    self.nodes_considered, self.expanded, max_nodes, max_memory, deadline, cancel_token)
+                if reason:
+                    self.time_taken = int(
+                        round((time.time() - start_time) * 1000, 0))
+                    for state_file in layers + runs:
+                        self.__close_file(state_file)
+                    raise AStar.SolveInterrupted(
+                        reason, self.nodes_considered, self.time_taken)
+
+                self.expanded += 1
+                symbols = encoder.to_symbols(code)
+                misplaced = self.get_misplaced(symbols)
+
+                for i, x in swaps:
+                    a = symbols[i]
+                    b = symbols[x]
+                    if a == b:
+                        continue
+
+                    # Work out the heuristic of the child from the two characters which moved
+                    child_misplaced = misplaced - (a != goal_symbols[i]) - (b != goal_symbols[x]) + (
+                        b != goal_symbols[i]) + (a != goal_symbols[x])
+                    child_f = child_f_base + (child_misplaced + 1) // 2
+                    if child_f > bound:
+                        if next_bound == None or child_f < next_bound:
+                            next_bound = child_f
+                        continue
+
+                    diff = a ^ b
+                    child = code ^ (diff << shifts[i]) ^ (diff << shifts[x])
+                    self.nodes_considered += 1
+                    if child == goal:
+                        found = True
+                        break
+                    buffer.add(child)
+
+                # Spill the buffer to disk once it is full
+                if len(buffer) >= self.max_buffered_states:
+                    runs.append(self.__write_run(buffer, len(runs)))
+                    buffer = set()
+
+                self.update()
+                if found:
+                    break
+
+            if found:
+                for state_file in runs:
+                    self.__close_file(state_file)
+                return layers, None
+
+            # Merge the runs into the next layer, removing the states already in this layer or the one before it
+            runs = self.__reduce_runs(runs)
+            next_layer = self.__new_file("layer_" + str(depth + 1))
+            streams = [iter(run) for run in runs] + [sorted(buffer)]
+            size = next_layer.write(
+                subtract(merge_unique(streams), layers[max(depth - 1, 0):]))
+            buffer = None
+            for state_file in runs:
+                self.__close_file(state_file)
+
+            self.stats["layers"] += 1
+            self.stats["largest layer"] = max(
+                self.stats["largest layer"], size)
+            layers.append(next_layer)
+            if size == 0:
+                break
+
+        for state_file in layers:
+            self.__close_file(state_file)
+        return None, next_bound
+
+    def __write_run(self, buffer: set, num: int) -> StateFile:
+        """Sort the buffered children and write them to a run file."""
+
+        run = self.__new_file("run_" + str(num))
+        run.write(sorted(buffer))
+        self.stats["runs written"] += 1
+        return run
+
+    def __reduce_runs(self, runs: List[StateFile]) -> List[StateFile]:
+        """Merge the runs together until there are few enough to be merged at once."""
+
+        # One place is left for the in memory buffer
+        generation = 0
+        while len(runs) >= self.merge_width:
+            merged = []
+            for group in range(0, len(runs), self.merge_width):
+                run = self.__new_file("merge_" + str(generation) +
+                                      "_" + str(len(merged)))
+                run.write(merge_unique(runs[group:group + self.merge_width]))
+                for state_file in runs[group:group + self.merge_width]:
+                    self.__close_file(state_file)
+                merged.append(run)
+            self.stats["runs written"] += len(merged)
+            runs = merged
+            generation += 1
+        return runs
+
+    def __build_path(self, layers: List[StateFile], goal: int) -> List[int]:
+        """Walk back from the goal, scanning each layer for a state one swap away from the next step."""
+
+        path = [goal]
+        for layer in reversed(layers):
+            neighbours = set(self.encoder.swap(path[-1], i, x)
+                             for i, x in self.swaps)
+            for code in layer:
+                if code in neighbours:
+                    path.append(code)
+                    break
+            self.__close_file(layer)
+        path.reverse()
+        return path
+
+
+def ExternalStringSolver_example():
+    import random
+
+    goal = "ExternalMemory"
+    letters = list(goal)
+    random.shuffle(letters)
+    start = "".join(letters)
+
+    # Keep at most 1000 states in memory at once
+    a = ExternalStringSolver(start, goal, max_buffered_states=1000)
+    a.solve()
+    for num, step in enumerate(a.path):
+        print(str(num) + ": " + step)
+    print("Swaps: " + str(len(a.path) - 1) + ", Time Taken: " +
+          str(a.time_taken) + ", Nodes Considered: " + str(a.nodes_considered))
+    print(a.stats)
+
+
+if __name__ == "__main__":
+    ExternalStringSolver_example()
@@ -0,0 +1,357 @@
+import heapq
+import math
+import time
+import AStar
+from array import array
+from typing import Optional, Iterable, List, Tuple
+
+
+class CSRGraph(object):
+    """
+    Weighted graph stored in compressed sparse row (CSR) form, nodes are the integers 0 to node_count - 1.
+    The edges leaving node n are targets[offsets[n]:offsets[n + 1]], with the matching weights. Every array is a typed array,
+    so a graph uses a few bytes per edge rather than a python object per node.
+        How to use:
+            Build a graph with CSRGraph.from_edges or CSRGraph.load_edge_list.
+        Init parameters:
+            offsets (array) - The index of the first edge of each node, with node_count + 1 entries.
+            targets (array) - The node each edge leads to.
+            weights (array) - The cost of each edge.
+            coordinates (list) - Optional (x, y) position of each node, used for the euclidean heuristic.
+    """
+
+    def __init__(self, offsets: array, targets: array, weights: array, coordinates: Optional[List[Tuple[float, float]]] = None):
+
+        self.node_count = len(offsets) - 1
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.xs = None
+        self.ys = None
+
+        if coordinates != None:
+            if len(coordinates) != self.node_count:
+                raise ValueError("There must be one coordinate per node")
+            self.xs = array("d", (coords[0] for coords in coordinates))
+            self.ys = array("d", (coords[1] for coords in coordinates))
+
+    @classmethod
+    def from_edges(cls, node_count: int, edges: Iterable[Tuple[int, int, float]], coordinates: Optional[List[Tuple[float, float]]] = None, undirected: Optional[bool] = False):
+        """
+        Build a graph from (source, target, weight) edges.
+        If undirected is set, every edge can be travelled in both directions.
+        """
+
+        sources = array("q")
+        targets = array("q")
+        weights = array("d")
+        for source, target, weight in edges:
+            if not (0 <= source < node_count and 0 <= target < node_count):
+                raise ValueError("Edge (" + str(source) + ", " +
+                                 str(target) + ") refers to a node outside of the graph")
+            if weight < 0:
+                raise ValueError("Edge weights can't be negative")
+
+            sources.append(source)
+            targets.append(target)
+            weights.append(weight)
+            if undirected:
+                sources.append(target)
+                targets.append(source)
+                weights.append(weight)
+
+        # Count the edges leaving each node, then turn the counts into offsets
+        offsets = array("q", bytes(8 * (node_count + 1)))
+        for source in sources:
+            offsets[source + 1] += 1
+        for node in range(node_count):
+            offsets[node + 1] += offsets[node]
+
+        # Place each edge in its source's slice
+        position = array("q", offsets[:-1])
+        csr_targets = array("q", bytes(8 * len(targets)))
+        csr_weights = array("d", bytes(8 * len(weights)))
+        for edge in range(len(sources)):
+            index = position[sources[edge]]
+            position[sources[edge]] += 1
+            csr_targets[index] = targets[edge]
+            csr_weights[index] = weights[edge]
+
+        return cls(offsets, csr_targets, csr_weights, coordinates)
+
+    @classmethod
+    def load_edge_list(cls, path: str, coordinates_path: Optional[str] = None, undirected: Optional[bool] = False):
+        """
+        Load a graph from a text file with one "source target weight" edge per line (the weight defaults to 1).
+        Coordinates can be loaded from a second file with one "x y" line per node.
+        Blank lines and lines starting with # are ignored.
+        """
+
+        def read_lines(file_path: str):
+            with open(file_path) as text_file:
+                for line in text_file:
+                    line = line.strip()
+                    if line and not line.startswith("#"):
+                        yield line.split()
+
+        edges = []
+        node_count = 0
+        for fields in read_lines(path):
+            edge = (int(fields[0]), int(fields[1]),
+                    float(fields[2]) if len(fields) > 2 else 1.0)
+            node_count = max(node_count, edge[0] + 1, edge[1] + 1)
+            edges.append(edge)
+
+        coordinates = None
+        if coordinates_path != None:
+            coordinates = [(float(fields[0]), float(fields[1]))
+                           for fields in read_lines(coordinates_path)]
+            node_count = max(node_count, len(coordinates))
+
+        return cls.from_edges(node_count, edges, coordinates, undirected)
+
+    @classmethod
+    def from_grid(cls, grid_map, diagonal_enabled: Optional[bool] = False):
+        """
+        Build a graph from a grid map (such as an AStar_map.GridMap), the node id of a tile is y * width + x.
+        Moves cost the same as in Movement2DSolver (1 for straight moves and 2 for diagonal ones), multiplied by the cost of the tile moved onto.
+        """
+
+        moves = [(1, 0), (0, 1), (-1, 0), (0, -1)]
+        if diagonal_enabled:
+            moves += [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+
+        def generate_edges():
+            for y in range(grid_map.height):
+                for x in range(grid_map.width):
+                    if not grid_map.get_cost((x, y)):
+                        continue
+                    for move in moves:
+                        cost = grid_map.get_cost((x + move[0], y + move[1]))
+                        if cost:
+                            yield (y * grid_map.width + x, (y + move[1]) * grid_map.width + x + move[0], cost * (abs(move[0]) + abs(move[1])))
+
+        coordinates = [(x, y) for y in range(grid_map.height)
+                       for x in range(grid_map.width)]
+        return cls.from_edges(grid_map.width * grid_map.height, generate_edges(), coordinates)
+
+    def get_edges(self, node: int):
+        """Returns an iterator of the (target, weight) edges leaving a node."""
+
+        for index in range(self.offsets[node], self.offsets[node + 1]):
+            yield self.targets[index], self.weights[index]
+
+
+class GraphSolver(AStar.AStarSolver):
+    """
+    A* solver for weighted graphs stored as a CSRGraph, runs Dijkstra's algorithm if there is no heuristic.
+    The bookkeeping (g values, parents and the closed list) is held in arrays indexed by node id. They are kept between solves,
+    so solving many queries on the same graph only resets the entries the last query touched.
+        Init parameters:
+            graph (CSRGraph) - The graph to solve on.
+            start (int) - The starting node.
+            goal (int) - The goal node.
+            use_heuristic (bool) - Whether to use the euclidean distance to the goal as a heuristic (the graph must have coordinates).
+            heuristic_scale (float) - The euclidean distance is multiplied by this, the heuristic is only admissible if
+            no edge costs less than heuristic_scale times the distance it covers.
+            forbidden_states (set) - Any nodes in this set will not be permitted.
+    """
+
+    def __init__(self, graph: CSRGraph, start: int, goal: int, use_heuristic: Optional[bool] = True, heuristic_scale: Optional[float] = 1.0, forbidden_states: Optional[set] = set()):
+        super(GraphSolver, self).__init__(
+            start, goal, forbidden_states=forbidden_states)
+        if not self.validate(graph):
+            raise Exception("Invalid inputs")
+
+        self.graph = graph
+        self.use_heuristic = use_heuristic and graph.xs != None
+        self.heuristic_scale = heuristic_scale
+        self.cost = 0
+
+        self.g = array("d", [math.inf]) * graph.node_count
+        self.parents = array("q", [-1]) * graph.node_count
+        self.closed = bytearray(graph.node_count)
+        self.touched = []
+
+    def validate(self, graph: CSRGraph) -> bool:
+        """Method for validating the starting information given to the solver."""
+
+        return 0 <= self.start < graph.node_count and 0 <= self.goal < graph.node_count
+
+    def get_dist(self, node: int) -> float:
+        """Returns the heuristic distance from a node to the goal."""
+
+        if not self.use_heuristic:
+            return 0
+        return self.heuristic_scale * math.hypot(self.graph.xs[node] - self.graph.xs[self.goal], self.graph.ys[node] - self.graph.ys[self.goal])
+
+    def reset(self, start: Optional[int] = None, goal: Optional[int] = None):
+        """Clear the results of the last solve, optionally changing the start and goal so the solver can be reused."""
+
+        for node in self.touched:
+            self.g[node] = math.inf
+            self.parents[node] = -1
+            self.closed[node] = 0
+        self.touched = []
+        self.path = []
+        self.cost = 0
+        self.search_started = False
+
+        if start != None:
+            self.start = start
+        if goal != None:
+            self.goal = goal
+        if not self.validate(self.graph):
+            raise Exception("Invalid inputs")
+
+    def begin(self):
+        """
+        Set up the search, this is called by the first call to step (or solve).
+        """
+
+        if not self.is_reachable():
+            raise RuntimeError("No path")
+        if self.touched:
+            self.reset()
+
+        for node in self.forbidden_states:
+            if 0 <= node < self.graph.node_count:
+                self.closed[node] = 1
+                self.touched.append(node)
+
+        self.g[self.start] = 0
+        self.touched.append(self.start)
+        self.open_list = [(self.get_dist(self.start), 0, self.start)]
+        # The (heuristic, node) of the expanded node closest to the goal, reported if the search is stopped
+        self.best = (self.get_dist(self.start), self.start)
+        self.search_started = True
+        self.nodes_considered = 0
+        self.expanded = 0
+        self.time_spent = 0
+
+    def step(self, max_expansions: Optional[int] = None, max_nodes: Optional[int] = None, max_memory: Optional[int] = None, deadline: Optional[float] = None, cancel_token=None) -> bool:
+        """
+        Carry on the search for at most max_expansions nodes, the search state is kept between calls (see AStarSolver.step).\n
+        The path is a list of node ids, and the total cost of the path is stored in the .cost attribute.
+        """
+
+        if self.path:
+            return True
+        if not self.search_started:
+            self.begin()
+
+        start_time = time.time()
+        offsets = self.graph.offsets
+        targets = self.graph.targets
+        weights = self.graph.weights
+        g = self.g
+        parents = self.parents
+        closed = self.closed
+        touched = self.touched
+        goal = self.goal
+        open_list = self.open_list
+        count = self.nodes_considered
+        expanded = self.expanded
+        best = self.best
+        expansions = 0
+
+        try:
+            while open_list:
+                if max_expansions != None and expansions >= max_expansions:
+                    return False
+
+                reason = self.check_limits(
+                    count, expanded, max_nodes, max_memory, deadline, cancel_token)
+                if reason:
+                    best_state = AStar.State(best[1], 0, self.start, self.goal)
+                    best_state.h = best[0]
+                    best_state.path = self.__build_path(best[1])
+                    raise AStar.SolveInterrupted(reason, count, int(
+                        round((self.time_spent + time.time() - start_time) * 1000, 0)), best_state)
+
+                node_f, node_g, node = open_list[0]
+                if node == goal:
+                    break
+                heapq.heappop(open_list)
+                if closed[node]:
+                    continue
+                closed[node] = 1
+                expanded += 1
+                expansions += 1
+                if node_f - node_g < best[0]:
+                    best = (node_f - node_g, node)
+                if self.trace != None:
+                    self.trace.record(node, node_f, node_g)
+
+                for index in range(offsets[node], offsets[node + 1]):
+                    target = targets[index]
+                    target_g = node_g + weights[index]
+                    if closed[target] or target_g >= g[target]:
+                        continue
+
+                    if g[target] == math.inf:
+                        touched.append(target)
+                    g[target] = target_g
+                    parents[target] = node
+                    count += 1
+                    heapq.heappush(
+                        open_list, (target_g + self.get_dist(target), target_g, target))
+
+                self.nodes_considered = count
+                self.update()
+        finally:
+            # Save the search state so it can be carried on by the next call
+            self.nodes_considered = count
+            self.expanded = expanded
+            self.best = best
+            self.time_spent += time.time() - start_time
+            self.time_taken = int(round(self.time_spent * 1000, 0))
+
+        if g[goal] == math.inf:
+            raise RuntimeError("No path")
+
+        self.cost = g[goal]
+        self.path = self.__build_path(goal)
+        return True
+
+    def __build_path(self, node: int) -> List[int]:
+        """Follow the parents back from a reached node to build the path to it."""
+
+        path = [node]
+        while path[-1] != self.start:
+            path.append(self.parents[path[-1]])
+        path.reverse()
+        return path
+
+    def get_frontier(self) -> list:
+        """Returns the nodes waiting to be expanded (the open list), in no particular order."""
+
+        return [item[2] for item in self.open_list if not self.closed[item[2]]]
+
+
+def GraphSolver_example():
+    # A 200 x 200 grid graph with random edge weights
+    import random
+
+    size = 200
+    coordinates = [(x, y) for y in range(size) for x in range(size)]
+    edges = []
+    for y in range(size):
+        for x in range(size):
+            node = y * size + x
+            if x + 1 < size:
+                edges.append((node, node + 1, random.uniform(1, 3)))
+            if y + 1 < size:
+                edges.append((node, node + size, random.uniform(1, 3)))
+    graph = CSRGraph.from_edges(
+        size * size, edges, coordinates, undirected=True)
+
+    for use_heuristic in (False, True):
+        a = GraphSolver(graph, 0, size * size - 1, use_heuristic)
+        a.solve()
+        print(("A*" if use_heuristic else "Dijkstra") + ": cost " + str(round(a.cost, 3)) +
+              ", Time Taken: " + str(a.time_taken) + ", Nodes Considered: " + str(a.nodes_considered))
+
+
+if __name__ == "__main__":
+    GraphSolver_example()
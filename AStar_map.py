@@ -0,0 +1,281 @@
+import mmap
+import struct
+import AStar
+from typing import Optional, List, Tuple
+
+# File format
+# A map file is a fixed size header followed by one cell per tile, stored row by row (index = y * width + x).
+#   Header: magic (4 bytes), version (uint16), cell format (uint16), width (uint32), height (uint32), all little endian.
+#   FORMAT_BITS - One bit per cell (1 is passable, 0 is a wall), the least significant bit of each byte comes first.
+#   FORMAT_BYTES - One byte per cell holding the cost of entering the tile, 0 is a wall.
+# The file is opened with mmap, so every process using the same map shares a single page cached copy of it.
+
+MAGIC = b"ASTM"
+VERSION = 1
+HEADER = struct.Struct("<4sHHII")
+FORMAT_BITS = 0
+FORMAT_BYTES = 1
+
+
+class GridMap(object):
+    """
+    Read only view of a map file, the cells are read straight from the memory mapped file without parsing it.
+        How to use:
+            Open with GridMap(path), or use it as a context manager to close the file automatically.
+            Coordinates outside of the map are treated as walls.
+        Init parameters:
+            path (str) - The map file to open.
+    """
+
+    def __init__(self, path: str):
+
+        with open(path, "rb") as map_file:
+            self.__mmap = mmap.mmap(
+                map_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self.__mmap) < HEADER.size:
+            self.close()
+            raise ValueError("Not a map file: " + str(path))
+
+        magic, version, cell_format, self.width, self.height = HEADER.unpack_from(
+            self.__mmap, 0)
+        if magic != MAGIC or version != VERSION or cell_format not in (FORMAT_BITS, FORMAT_BYTES):
+            self.close()
+            raise ValueError("Not a map file: " + str(path))
+
+        self.path = path
+        self.cell_format = cell_format
+        self.cells = memoryview(self.__mmap)[HEADER.size:]
+
+        if len(self.cells) < get_data_size(self.width, self.height, cell_format):
+            self.close()
+            raise ValueError("Map file is truncated: " + str(path))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Close the memory map (any views of the cells must not be used afterwards)."""
+
+        if getattr(self, "cells", None) != None:
+            self.cells.release()
+            self.cells = None
+        self.__mmap.close()
+
+    def in_bounds(self, coords: Tuple[int, int]) -> bool:
+        """Returns whether the coordinates are on the map."""
+
+        return 0 <= coords[0] < self.width and 0 <= coords[1] < self.height
+
+    def get_cost(self, coords: Tuple[int, int]) -> int:
+        """Returns the cost of entering the tile at coords, 0 means the tile is a wall."""
+
+        if not self.in_bounds(coords):
+            return 0
+
+        index = coords[1] * self.width + coords[0]
+        if self.cell_format == FORMAT_BITS:
+            return (self.cells[index >> 3] >> (index & 7)) & 1
+        return self.cells[index]
+
+    def is_passable(self, coords: Tuple[int, int]) -> bool:
+        """Returns whether the tile at coords can be moved onto."""
+
+        return self.get_cost(coords) != 0
+
+    def to_tiles(self) -> List[List[int]]:
+        """Convert the map into a tile matrix in the format used by MapCreationWindow (indexed [x][y], 1 is a wall and 0 is empty)."""
+
+        return [[0 if self.is_passable((x, y)) else 1 for y in range(self.height)]
+                for x in range(self.width)]
+
+
+class TileGrid(object):
+    """
+    Grid map read from a tile matrix in the format used by MapCreationWindow, with the same interface as GridMap.
+    This lets the tools which take a GridMap (such as CSRGraph.from_grid) be used on a map being edited.
+        Init parameters:
+            tiles (list) - The tile matrix (indexed [x][y], 1 is a wall).
+    """
+
+    def __init__(self, tiles: List[List[int]]):
+
+        self.tiles = tiles
+        self.width = len(tiles)
+        self.height = len(tiles[0]) if self.width else 0
+
+    def in_bounds(self, coords: Tuple[int, int]) -> bool:
+        """Returns whether the coordinates are on the map."""
+
+        return 0 <= coords[0] < self.width and 0 <= coords[1] < self.height
+
+    def get_cost(self, coords: Tuple[int, int]) -> int:
+        """Returns the cost of entering the tile at coords, 0 means the tile is a wall."""
+
+        if not self.in_bounds(coords) or self.tiles[coords[0]][coords[1]] == 1:
+            return 0
+        return 1
+
+    def is_passable(self, coords: Tuple[int, int]) -> bool:
+        """Returns whether the tile at coords can be moved onto."""
+
+        return self.get_cost(coords) != 0
+
+
+class GridMapVisitedSet(set):
+    """
+    Visited queue for solving on a GridMap, walls of the map are treated as if they had already been visited.
+    This means the walls never have to be copied into a python set.
+        Init parameters:
+            grid_map (GridMap) - The map to solve on.
+            forbidden_states (set) - Any extra locations which are not permitted.
+    """
+
+    def __init__(self, grid_map: GridMap, forbidden_states: Optional[set] = set()):
+        super(GridMapVisitedSet, self).__init__(forbidden_states)
+        self.grid_map = grid_map
+
+    def __contains__(self, coords) -> bool:
+        return super(GridMapVisitedSet, self).__contains__(coords) or not self.grid_map.is_passable(coords)
+
+    def __reduce__(self):
+        # The map can't be pickled, so send it between processes as a normal set (for example when drawing progress).
+        return (set, (set(self),))
+
+
+class GridMapState(AStar.State2DMovement):
+    """
+    State2DMovement on a GridMap, moving onto a tile costs the move's cost multiplied by the cost of the tile (as in CSRGraph.from_grid).
+    Unlike State2DMovement, the goal state keeps its full distance so the search only stops once it is expanded,
+    a goal reached through expensive tiles could otherwise be taken before a cheaper path to it is found.
+        Init parameters:
+            value (tuple) - The position of this state.
+            parent (State) - The parent of this state.
+            start (tuple) - The start coordinate.
+            goal (tuple) - The goal coordinate
+            diagonal_enabled (bool) - Whether diagonal moving is enabled.
+            g (int) - The cost of the path to this state, if it has already been worked out (see create_children).
+            h (int) - The distance from this state to the goal, must be given along with g.
+            grid_map (GridMap) - The map, only needed for the first state (children take it from their parent).
+    """
+
+    def __init__(self, value: Tuple[int, int], parent: Optional[AStar.State] = 0, start: Optional[Tuple[int, int]] = None, goal: Optional[Tuple[int, int]] = None, diagonal_enabled: Optional[bool] = False, g: Optional[int] = None, h: Optional[int] = None, grid_map: Optional[GridMap] = None):
+
+        super(GridMapState, self).__init__(
+            value, parent, start, goal, diagonal_enabled, g, h)
+        self.grid_map = parent.grid_map if parent else grid_map
+        if g != None:
+            self.dist = g + h
+
+    def create_children(self, forbidden_states: Optional[set] = set()):
+        """
+        Create the children of this state\n
+        Can optionally be passed a forbidden_states set to prevent these states from being generated.
+        """
+
+        if not self.children:
+            allowed_moves = AStar.DIAGONAL_MOVES if self.diagonal_enabled else AStar.STRAIGHT_MOVES
+            x, y = self.value
+            goal_x, goal_y = self.goal
+            g = getattr(self, "g", 0)
+
+            for move_x, move_y, cost in allowed_moves:
+                val = (x + move_x, y + move_y)
+                tile_cost = self.grid_map.get_cost(val)
+                if tile_cost and not val in forbidden_states:
+                    self.children.append(GridMapState(val, self, diagonal_enabled=self.diagonal_enabled, g=g + cost * tile_cost,
+                                                      h=abs(val[0] - goal_x) + abs(val[1] - goal_y)))
+
+
+class Movement2DSolver(AStar.Movement2DSolver):
+    """
+    Sub-class of the normal Movement2DSolver which reads the walls and the cost of each tile from a GridMap.
+    Moving onto a tile costs the move's cost multiplied by the cost of the tile (see GridMapState), so paths on maps saved with
+    FORMAT_BYTES have the lowest total cost.
+        Init parameters:
+            grid_map (GridMap) - The map to solve on.
+            start (tuple) - The starting coordinates.
+            goal (tuple) - The goal coordinates.
+            diagonal_enabled (bool) - Defines whether diagonal movement is permitted.
+            forbidden_states (set) - Any extra locations which are not permitted.
+    """
+
+    def __init__(self, grid_map: GridMap, start: Tuple[int, int], goal: Tuple[int, int], diagonal_enabled: Optional[bool] = False, forbidden_states: Optional[set] = set()):
+        # The map is needed by get_start_state, which is called when the parent class is set up
+        self.grid_map = grid_map
+        super(Movement2DSolver, self).__init__(start, goal, diagonal_enabled)
+        if not self.validate():
+            raise Exception("Invalid inputs")
+        self.visited_queue = GridMapVisitedSet(grid_map, forbidden_states)
+
+    def validate(self) -> bool:
+        """Method for validating the starting information given to the solver."""
+
+        return self.grid_map.in_bounds(self.start) and self.grid_map.in_bounds(self.goal)
+
+    def get_start_state(self) -> GridMapState:
+        """Get the starting state object for this solver."""
+
+        return GridMapState(self.start, 0, self.start, self.goal, self.diagonal_enabled, grid_map=self.grid_map)
+
+
+def get_path_cost(grid_map, path: List[Tuple[int, int]]) -> int:
+    """
+    Returns the cost of a path of neighbouring tiles, each move costs 1 (or 2 if it is diagonal) multiplied by the cost of the tile moved onto.
+    This is the cost used by every grid solver (Movement2DSolver, CSRGraph.from_grid and RectangleReduction).
+    """
+
+    return sum((abs(a[0] - b[0]) + abs(a[1] - b[1])) * grid_map.get_cost(b) for a, b in zip(path, path[1:]))
+
+
+def get_data_size(width: int, height: int, cell_format: int) -> int:
+    """Returns the number of bytes needed to store the cells of a map."""
+
+    if cell_format == FORMAT_BITS:
+        return (width * height + 7) // 8
+    return width * height
+
+
+def encode_tiles(tiles: List[List[int]], cell_format: Optional[int] = FORMAT_BITS, costs: Optional[List[List[int]]] = None) -> bytes:
+    """
+    Convert a tile matrix in the format used by MapCreationWindow (indexed [x][y], 1 is a wall) into the contents of a map file.
+        Parameters:
+            tiles (list) - The tile matrix.
+            cell_format (int) - FORMAT_BITS or FORMAT_BYTES.
+            costs (list) - A matrix (indexed like tiles) of the cost of entering each tile, only stored by FORMAT_BYTES.
+            Costs are clamped to 1 - 255, if it is not given every tile costs 1.
+    """
+
+    width = len(tiles)
+    height = len(tiles[0]) if width else 0
+    data = bytearray(get_data_size(width, height, cell_format))
+
+    for x in range(width):
+        for y in range(height):
+            if tiles[x][y] == 1:
+                continue
+
+            index = y * width + x
+            if cell_format == FORMAT_BITS:
+                data[index >> 3] |= 1 << (index & 7)
+            else:
+                data[index] = min(max(costs[x][y], 1), 255) if costs else 1
+
+    return HEADER.pack(MAGIC, VERSION, cell_format, width, height) + bytes(data)
+
+
+def save_tiles(path: str, tiles: List[List[int]], cell_format: Optional[int] = FORMAT_BITS, costs: Optional[List[List[int]]] = None):
+    """Save a tile matrix to a map file, see encode_tiles for the parameters."""
+
+    with open(path, "wb") as map_file:
+        map_file.write(encode_tiles(tiles, cell_format, costs))
+
+
+def load_tiles(path: str) -> List[List[int]]:
+    """Load a map file into a tile matrix in the format used by MapCreationWindow."""
+
+    with GridMap(path) as grid_map:
+        return grid_map.to_tiles()
@@ -1,5 +1,8 @@
 import multiprocessing
 import AStar
+import AStar_map
+import AStar_rsr
+import AStar_components
 from typing import Optional, Dict, Tuple
 
 
@@ -34,6 +37,72 @@ class Movement2DSolver(AStar.Movement2DSolver):
         self.shared_memory["visited"] = self.visited_queue
 
 
+class GridMapSolver(AStar_map.Movement2DSolver):
+    """
+    Sub-class of AStar_map.Movement2DSolver with an update method for updating shared memory, so the cost of each tile is used.
+        Init parameters:
+            shared_memory (dict) - The shared memory object to update.
+            grid_map (GridMap) - The map to solve on.
+            start (tuple) - The starting coordinates.
+            goal (tuple) - The goal coordinates.
+            diagonal_enabled (bool) - Defines whether diagonal movement is permitted.
+            forbidden_states (set) - Any extra locations which are not permitted.
+    """
+
+    def __init__(self, shared_memory: dict, grid_map: AStar_map.GridMap, start: Tuple[int, int], goal: Tuple[int, int], diagonal_enabled: Optional[bool] = False, forbidden_states: Optional[set] = set()):
+        super().__init__(grid_map, start, goal, diagonal_enabled, forbidden_states)
+        self.shared_memory = shared_memory
+
+    def update(self):
+        """Method to update the shared memory object with the current visited_queue."""
+
+        self.shared_memory["visited"] = self.visited_queue
+
+
+class RSRSolver(AStar_rsr.RSRSolver):
+    """
+    Sub-class of the normal RSRSolver with an update method for updating shared memory.
+        Init parameters:
+            shared_memory (dict) - The shared memory object to update.
+            reduction (RectangleReduction) - The reduced map to solve on.
+            start (tuple) - The starting coordinates.
+            goal (tuple) - The goal coordinates.
+    """
+
+    def __init__(self, shared_memory: dict, reduction: AStar_rsr.RectangleReduction, start: Tuple[int, int], goal: Tuple[int, int]):
+        super().__init__(reduction, start, goal)
+        self.shared_memory = shared_memory
+
+    def update(self):
+        """Method to update the shared memory object with the tiles expanded so far."""
+
+        self.shared_memory["visited"] = self.visited_queue
+
+
+class StringSolver(AStar.StringSolver):
+    """
+    Sub-class of the normal StringSolver with an update method for reporting progress through shared memory.
+        Init parameters:
+            shared_memory (dict) - The shared memory object to update.
+            start (str) - The starting string.
+            goal (str) - The goal string.
+            update_interval (int) - The number of nodes to expand between each update of the shared memory.
+    """
+
+    def __init__(self, shared_memory: dict, start: str, goal: str, update_interval: Optional[int] = 500):
+        super().__init__(start, goal)
+        self.shared_memory = shared_memory
+        self.update_interval = update_interval
+        self.__expanded = 0
+
+    def update(self):
+        """Method to update the shared memory object with the current node count (only every update_interval calls, as each write is a round trip to the manager)."""
+
+        self.__expanded += 1
+        if self.__expanded % self.update_interval == 0:
+            self.shared_memory["nodes considered"] = self.nodes_considered
+
+
 class BaseSolverProcess(multiprocessing.Process):
     """
     Base class for running an AStar solver on another process (to allow for updating of the pygame display to happen in parallel)
@@ -64,18 +133,21 @@ class BaseSolverProcess(multiprocessing.Process):
         If there is no path, it will cancel and set the "path" in shared memory to -1.
         """
 
-        # Instantiate sovler
-        solver = self.solver(shared_memory=self.shared_memory, **self.kwargs)
+        solver = None
 
+        # Instantiate and run the sovler, some solvers validate their inputs on creation so this is included in the try.
         try:
+            solver = self.solver(
+                shared_memory=self.shared_memory, **self.kwargs)
             solver.solve()
             self.shared_memory["path"] = solver.path
         except Exception as e:
             self.shared_memory["path"] = -1
             print(e)
 
-        self.shared_memory["time taken"] = solver.time_taken
-        self.shared_memory["nodes considered"] = solver.nodes_considered
+        if solver:
+            self.shared_memory["time taken"] = solver.time_taken
+            self.shared_memory["nodes considered"] = solver.nodes_considered
 
 
 class Movement2DProcess(BaseSolverProcess):
@@ -100,3 +172,223 @@ class Movement2DProcess(BaseSolverProcess):
             forbidden_states=forbidden_states,
             diagonal_enabled=diagonal_enabled
         )
+
+
+class StringProcess(BaseSolverProcess):
+    """
+    Class for running a string solver on another process.
+        Init parameters:
+            start (str) - The starting string.
+            goal (str) - The goal string.
+            shared_memory (dict) - The shared memory object created by the string change window.
+            update_interval (int) - The number of nodes to expand between each progress update.
+    """
+
+    def __init__(self, start: str, goal: str, shared_memory: dict, update_interval: Optional[int] = 500):
+        super(StringProcess, self).__init__(
+            StringSolver,
+            shared_memory,
+            start=start,
+            goal=goal,
+            update_interval=update_interval
+        )
+        # The string window can exit while a solve is running, so don't keep it alive.
+        self.daemon = True
+
+
+class Movement2DService(multiprocessing.Process):
+    """
+    Long lived process which keeps a 2D map loaded and solves queries on it, so that no new process has to be started for each solve.
+        How to use:
+            Call .start() once, then keep the map up to date using the load_map (or load_map_file) and set_tile methods.
+            Each call to solve queues a query on the current map, the results are written to the given shared memory dict
+            using the same keys as BaseSolverProcess ("path", "visited", "time taken" and "nodes considered").
+            Call .cancel() to stop the running query, and .stop() to shut the service down.
+            Call .use_reduction() to solve queries on a RectangleReduction of the map (see AStar_rsr), which is kept up to date as tiles change.
+            If the size of the map is known (it is given or a map file is loaded), a ComponentIndex (see AStar_components) is kept
+            so queries between unconnected tiles are rejected without searching.
+        Init parameters:
+            forbidden_states (set) - The forbidden locations of the initial map.
+            size (tuple) - The (width, height) of the map, locations outside of it must be in forbidden_states.
+    """
+
+    def __init__(self, forbidden_states: Optional[set] = set(), size: Optional[Tuple[int, int]] = None):
+        super(Movement2DService, self).__init__()
+        self.daemon = True
+        self.forbidden_states = set(forbidden_states)
+        self.size = size
+        self.components = None
+        self.grid_map = None
+        # The size of the map to reduce (None if queries are solved with Movement2DSolver), and the reduction once it is built.
+        self.reduction_size = None
+        self.reduction = None
+        self.requests = multiprocessing.Queue()
+        self.cancel_event = multiprocessing.Event()
+
+    def load_map(self, forbidden_states: set):
+        """Replace the map held by the service."""
+
+        self.requests.put(("map", forbidden_states))
+
+    def load_map_file(self, path: str):
+        """
+        Replace the map held by the service with a map file (see AStar_map), the file is memory mapped rather than loaded.
+        Changes made with set_tile are applied on top of the file, so walls in the file can't be made passable.
+        """
+
+        self.requests.put(("map file", path))
+
+    def set_tile(self, coords: Tuple[int, int], passable: bool):
+        """Change a single tile of the map held by the service."""
+
+        self.requests.put(("tile", tuple(coords), passable))
+
+    def use_reduction(self, size: Optional[Tuple[int, int]]):
+        """
+        Solve queries with RSRSolver on a map of the given (width, height), or with Movement2DSolver if size is None.
+        When a map file is loaded, its own size is used.
+        """
+
+        self.requests.put(("reduction", size))
+
+    def solve(self, shared_memory: dict, start: Tuple[int, int], goal: Tuple[int, int], diagonal_enabled: Optional[bool] = False):
+        """Queue a query on the current map, the results are written to shared_memory."""
+
+        self.requests.put(
+            ("solve", shared_memory, tuple(start), tuple(goal), diagonal_enabled))
+
+    def cancel(self):
+        """Cancel the query that is currently running (if there is one)."""
+
+        self.cancel_event.set()
+
+    def stop(self, timeout: Optional[float] = 1):
+        """Shut the service down, if it does not stop within timeout seconds it is terminated."""
+
+        self.cancel()
+        self.requests.put(("stop",))
+        self.join(timeout)
+        if self.is_alive():
+            self.terminate()
+            self.join()
+
+    def run(self):
+        """
+        Override of the normal process run method, handles messages until it is told to stop.
+        """
+
+        while True:
+            message = self.requests.get()
+
+            if message[0] == "stop":
+                break
+            elif message[0] == "map":
+                self.__close_map_file()
+                self.forbidden_states = set(message[1])
+                self.reduction = None
+                self.components = None
+            elif message[0] == "map file":
+                self.__close_map_file()
+                self.forbidden_states = set()
+                self.reduction = None
+                self.components = None
+                try:
+                    self.grid_map = AStar_map.GridMap(message[1])
+                except (OSError, ValueError) as e:
+                    print(e)
+            elif message[0] == "tile":
+                if message[2]:
+                    self.forbidden_states.discard(message[1])
+                else:
+                    self.forbidden_states.add(message[1])
+                if self.reduction != None:
+                    self.reduction.set_tile(
+                        message[1], self.__get_tile_cost(message[1]))
+                if self.components != None:
+                    self.components.set_tile(
+                        message[1], self.__get_tile_cost(message[1]) != 0)
+            elif message[0] == "reduction":
+                self.reduction_size = message[1]
+                self.reduction = None
+            elif message[0] == "solve":
+                self.__solve(*message[1:])
+
+        self.__close_map_file()
+
+    def __close_map_file(self):
+        """Close the map file held by the service (if there is one)."""
+
+        if self.grid_map != None:
+            self.grid_map.close()
+            self.grid_map = None
+
+    def __get_tile_cost(self, coords: Tuple[int, int]) -> int:
+        """Returns the cost of entering a tile of the current map, 0 means the tile is a wall."""
+
+        if coords in self.forbidden_states:
+            return 0
+        elif self.grid_map != None:
+            return self.grid_map.get_cost(coords)
+        return 1
+
+    def __get_grid(self, size: Optional[Tuple[int, int]]):
+        """Returns the map file, or an empty grid of the given size (the forbidden states are added by the caller), or None if neither is known."""
+
+        if self.grid_map != None:
+            return self.grid_map
+        elif size != None:
+            return AStar_map.TileGrid([[0] * size[1] for _ in range(size[0])])
+        return None
+
+    def __get_reduction(self, diagonal_enabled: bool) -> AStar_rsr.RectangleReduction:
+        """Returns the reduction of the current map, building it if the map has changed since it was last built."""
+
+        if self.reduction == None or self.reduction.diagonal_enabled != diagonal_enabled:
+            self.reduction = AStar_rsr.RectangleReduction(self.__get_grid(
+                self.reduction_size), diagonal_enabled, self.forbidden_states)
+        return self.reduction
+
+    def __get_components(self, diagonal_enabled: bool) -> Optional[AStar_components.ComponentIndex]:
+        """Returns the component index of the current map (building it if the map has changed), or None if the size of the map isn't known."""
+
+        if self.components == None or self.components.diagonal_enabled != diagonal_enabled:
+            grid_map = self.__get_grid(self.size or self.reduction_size)
+            if grid_map == None:
+                return None
+            self.components = AStar_components.ComponentIndex(
+                grid_map, diagonal_enabled, self.forbidden_states)
+        return self.components
+
+    def __solve(self, shared_memory: dict, start: Tuple[int, int], goal: Tuple[int, int], diagonal_enabled: bool):
+        """
+        Run a single query on the current map.
+        If there is no path (or the query is cancelled), the "path" in shared memory is set to -1.
+        """
+
+        # Any cancellation before this point was meant for an earlier query.
+        self.cancel_event.clear()
+        solver = None
+
+        try:
+            if self.reduction_size != None:
+                solver = RSRSolver(shared_memory, self.__get_reduction(
+                    diagonal_enabled), start, goal)
+            elif self.grid_map != None:
+                # Map files can give tiles different costs, which only the GridMap solver uses.
+                solver = GridMapSolver(shared_memory, self.grid_map, start, goal,
+                                       diagonal_enabled, self.forbidden_states)
+            else:
+                # The solver copies the forbidden set into its visited queue, so the map is left untouched.
+                solver = Movement2DSolver(
+                    shared_memory, start, goal, forbidden_states=self.forbidden_states, diagonal_enabled=diagonal_enabled)
+
+            solver.components = self.__get_components(diagonal_enabled)
+            solver.solve(cancel_token=self.cancel_event)
+            shared_memory["path"] = solver.path
+        except Exception as e:
+            shared_memory["path"] = -1
+            print(e)
+
+        if solver != None:
+            shared_memory["time taken"] = solver.time_taken
+            shared_memory["nodes considered"] = solver.nodes_considered
@@ -0,0 +1,410 @@
+import multiprocessing
+import heapq
+import queue
+import time
+import zlib
+import AStar
+from typing import Optional, List, Dict, Tuple
+
+
+def get_swap_lower_bound(value: str, goal: str) -> int:
+    """
+    Admissible heuristic for string reorganisation, one swap can fix at most two misplaced characters.
+    Unlike StateString.get_dist this never over estimates the number of swaps, so A* using it returns the shortest path.
+    """
+
+    misplaced = 0
+    for i in range(len(goal)):
+        if value[i] != goal[i]:
+            misplaced += 1
+    return (misplaced + 1) // 2
+
+
+def get_owner(value: str, workers: int) -> int:
+    """Returns the worker which owns the given state (crc32 is used as the str hash is randomised per process)."""
+
+    return zlib.crc32(value.encode("utf-8")) % workers
+
+
+class HDAWorker(multiprocessing.Process):
+    """
+    One worker of a HDAStringSolver, it owns every state whose hash maps to it and keeps its own open and closed lists.
+    Children owned by other workers are sent to them in batches.
+        Init parameters:
+            worker_id (int) - The index of this worker.
+            goal (str) - The goal string.
+            inboxes (list) - The message queue of every worker.
+            coordinator (Queue) - The queue used to report to the coordinator (the process running HDAStringSolver.solve).
+            start (str) - The starting string if this worker owns it, otherwise None.
+            batch_size (int) - The number of states to collect for another worker before sending them.
+            poll_interval (int) - The number of nodes to expand between each check of the inbox.
+            counters (Array) - Shared array the worker keeps its number of states generated in (at its worker_id), so the coordinator can follow the search.
+            max_memory (int) - The maximum resident memory of this worker in bytes, the coordinator is told once it is reached.
+    """
+
+    def __init__(self, worker_id: int, goal: str, inboxes: List[multiprocessing.Queue], coordinator: multiprocessing.Queue, start: Optional[str] = None, batch_size: Optional[int] = 64, poll_interval: Optional[int] = 32, counters=None, max_memory: Optional[int] = None):
+        super(HDAWorker, self).__init__()
+        self.daemon = True
+        self.worker_id = worker_id
+        self.goal = goal
+        self.inboxes = inboxes
+        self.coordinator = coordinator
+        self.start_value = start
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.counters = counters
+        self.max_memory = max_memory
+
+    def run(self):
+        """
+        Override of the normal process run method, searches until the coordinator sends the stop message.
+        """
+
+        workers = len(self.inboxes)
+        inbox = self.inboxes[self.worker_id]
+        self.bound = float("inf")
+        self.open_list = []
+        # Best known g value and parent of every state seen by this worker (this is both the open and closed list).
+        self.seen: Dict[str, Tuple[int, Optional[str]]] = {}
+        self.outboxes = [[] for _ in range(workers)]
+        self.stats = {
+            "nodes expanded": 0,
+            "states generated": 0,
+            "states sent": 0,
+            "batches sent": 0,
+            "batches received": 0
+        }
+        counter = 0
+        reported_idle = False
+        reported_memory = False
+
+        if self.start_value != None:
+            self.__add_state(self.start_value, 0, None)
+
+        while True:
+            # Handle messages, if there is nothing to expand wait for one.
+            while True:
+                idle = not self.__has_work()
+                if idle:
+                    self.__flush()
+                    if not reported_idle:
+                        self.coordinator.put(
+                            ("idle", self.worker_id, self.stats["batches sent"], self.stats["batches received"]))
+                        reported_idle = True
+                    message = inbox.get()
+                else:
+                    try:
+                        message = inbox.get_nowait()
+                    except queue.Empty:
+                        break
+
+                if message[0] == "states":
+                    self.stats["batches received"] += 1
+                    reported_idle = False
+                    for value, g, parent in message[1]:
+                        self.__add_state(value, g, parent)
+                elif message[0] == "bound":
+                    self.bound = min(self.bound, message[1])
+                elif message[0] == "probe":
+                    self.coordinator.put(("probe reply", message[1], self.worker_id, not self.__has_work(
+                    ), self.stats["batches sent"], self.stats["batches received"]))
+                elif message[0] == "parent":
+                    self.coordinator.put(
+                        ("parent reply", message[1], self.seen[message[1]][1]))
+                elif message[0] == "stop":
+                    self.coordinator.put(
+                        ("stats", self.worker_id, self.stats))
+                    return
+
+            # Expand some nodes before checking the inbox again.
+            for _ in range(self.poll_interval):
+                if not self.__has_work():
+                    break
+                self.__expand(heapq.heappop(self.open_list), workers)
+                counter += 1
+                if counter % self.poll_interval == 0:
+                    self.__flush(self.batch_size)
+
+            if self.counters != None:
+                self.counters[self.worker_id] = self.stats["states generated"]
+            if self.max_memory != None and not reported_memory and AStar.get_memory_usage() >= self.max_memory:
+                self.coordinator.put(("limit", "max_memory"))
+                reported_memory = True
+
+    def __has_work(self) -> bool:
+        """Returns whether there is a node worth expanding (nodes which can't beat the best solution are dropped)."""
+
+        while self.open_list:
+            f, _, g, value = self.open_list[0]
+            if f >= self.bound:
+                self.open_list = []
+            elif self.seen[value][0] < g:
+                # A shorter route to this state was found after it was queued.
+                heapq.heappop(self.open_list)
+            else:
+                return True
+        return False
+
+    def __add_state(self, value: str, g: int, parent: Optional[str]):
+        """Add a state owned by this worker to the open list, if it hasn't already been reached with a lower g."""
+
+        if value in self.seen and self.seen[value][0] <= g:
+            return
+        self.seen[value] = (g, parent)
+
+        if value == self.goal:
+            # Report the solution, the search carries on until it is known that there is no shorter one.
+            if g < self.bound:
+                self.bound = g
+                self.coordinator.put(("solution", g, self.worker_id))
+            return
+
+        h = get_swap_lower_bound(value, self.goal)
+        heapq.heappush(self.open_list, (g + h, h, g, value))
+
+    def __expand(self, node: tuple, workers: int):
+        """Generate the children of a node and send them to their owners."""
+
+        _, _, g, value = node
+        self.stats["nodes expanded"] += 1
+
+        letters = list(value)
+        for i in range(len(letters)):
+            for x in range(i + 1, len(letters)):
+                if letters[i] == letters[x]:
+                    continue
+                letters[i], letters[x] = letters[x], letters[i]
+                child = "".join(letters)
+                letters[i], letters[x] = letters[x], letters[i]
+
+                self.stats["states generated"] += 1
+                owner = get_owner(child, workers)
+                if owner == self.worker_id:
+                    self.__add_state(child, g + 1, value)
+                else:
+                    self.outboxes[owner].append((child, g + 1, value))
+
+    def __flush(self, minimum: Optional[int] = 1):
+        """Send every outbox holding at least minimum states to its owner."""
+
+        for owner, outbox in enumerate(self.outboxes):
+            if outbox and len(outbox) >= minimum:
+                self.inboxes[owner].put(("states", outbox))
+                self.stats["states sent"] += len(outbox)
+                self.stats["batches sent"] += 1
+                self.outboxes[owner] = []
+
+
+class HDAStringSolver(AStar.StringSolver):
+    """
+    Parallel string solver using hash distributed A* (HDA*).
+    Every state is owned by one worker process (chosen by a hash of the string), each worker keeps its own open and closed lists
+    and sends the children it generates to their owners in batches.
+    The search only stops once every worker is idle and no messages are in flight, so the returned path has the fewest swaps.
+        Init parameters:
+            start (str) - The starting string.
+            goal (str) - The goal string.
+            workers (int) - The number of worker processes, defaults to the number of cores.
+            batch_size (int) - The number of states to collect for another worker before sending them.
+    """
+
+    def __init__(self, start: str, goal: str, workers: Optional[int] = None, batch_size: Optional[int] = 64):
+        super(HDAStringSolver, self).__init__(start, goal)
+        self.workers = workers if workers else multiprocessing.cpu_count()
+        self.batch_size = batch_size
+        # Statistics reported by each worker (see HDAWorker.stats), set once solve finishes.
+        self.worker_stats = []
+
+    def solve(self, max_nodes: Optional[int] = None, max_memory: Optional[int] = None, deadline: Optional[float] = None, cancel_token=None):
+        """
+        Creates the shortest solution on how to get from the start, to the goal.\n
+        This method returns the path created, but it can also be gained by using the .path atribute.\n
+        The limits are the same as AStarSolver.solve, except max_memory which applies to each worker process.
+        If one of them stops the search a SolveInterrupted exception is raised.
+        """
+
+        start_time = time.time()
+
+        if self.start == self.goal:
+            self.path = [self.start]
+            self.time_taken = 0
+            self.nodes_considered = 0
+            return self.path
+
+        inboxes = [multiprocessing.Queue() for _ in range(self.workers)]
+        coordinator = multiprocessing.Queue()
+        counters = multiprocessing.Array("q", self.workers, lock=False)
+        start_owner = get_owner(self.start, self.workers)
+        processes = [HDAWorker(worker_id, self.goal, inboxes, coordinator, self.start if worker_id == start_owner else None, self.batch_size,
+                               counters=counters, max_memory=max_memory)
+                     for worker_id in range(self.workers)]
+        for process in processes:
+            process.start()
+
+        reason = None
+        try:
+            best = self.__wait_for_termination(
+                inboxes, coordinator, counters, max_nodes, deadline, cancel_token)
+            self.path = self.__rebuild_path(
+                processes, inboxes, coordinator, best[1], counters, deadline, cancel_token)
+        except AStar.SolveInterrupted as e:
+            # Raised again below, once the workers have reported how many nodes they considered
+            reason = e.reason
+        finally:
+            self.worker_stats = self.__stop_workers(
+                processes, inboxes, coordinator)
+            self.time_taken = int(round((time.time() - start_time) * 1000, 0))
+            self.nodes_considered = sum(
+                stats["states generated"] for stats in self.worker_stats)
+
+        if reason != None:
+            raise AStar.SolveInterrupted(
+                reason, self.nodes_considered, self.time_taken)
+        return self.path
+
+    def __rebuild_path(self, processes: list, inboxes: list, coordinator: multiprocessing.Queue, owner: int, counters, deadline: Optional[float], cancel_token) -> list:
+        """
+        Rebuild the path by asking the owner of each state for its parent, starting with the goal (held by the worker owner).\n
+        The deadline and cancel_token are still checked while waiting for replies, and a RuntimeError is raised if the worker asked has stopped.
+        """
+
+        path = [self.goal]
+        inboxes[owner].put(("parent", self.goal))
+        while True:
+            try:
+                message = coordinator.get(timeout=0.1)
+            except queue.Empty:
+                message = ("timeout",)
+            nodes = sum(counters)
+            reason = self.check_limits(
+                nodes, 0, None, None, deadline, cancel_token)
+            if reason:
+                raise AStar.SolveInterrupted(reason, nodes, 0)
+
+            if message[0] != "parent reply":
+                if not processes[owner].is_alive():
+                    raise RuntimeError("Worker " + str(owner) +
+                                       " stopped before the path was rebuilt")
+                continue
+            if message[2] == None:
+                break
+            path.append(message[2])
+            owner = get_owner(message[2], self.workers)
+            inboxes[owner].put(("parent", message[2]))
+        path.reverse()
+        return path
+
+    def __wait_for_termination(self, inboxes: list, coordinator: multiprocessing.Queue, counters, max_nodes: Optional[int], deadline: Optional[float], cancel_token) -> tuple:
+        """
+        Handle messages from the workers until the search has finished, returns the (cost, worker) of the best solution.\n
+        Termination is detected with two waves of counters: once every worker has reported that it is idle and the batches sent
+        and received add up, every worker is probed. If no worker's counters changed in between, nothing can have been in flight.
+        """
+
+        status = {}
+        snapshot = None
+        replies = {}
+        probe_id = 0
+        best = (float("inf"), None)
+
+        while True:
+            try:
+                message = coordinator.get(timeout=0.1)
+            except queue.Empty:
+                message = ("timeout",)
+            # The workers report how many states they have generated through counters, cancellation is checked every time
+            nodes = sum(counters)
+            reason = self.check_limits(
+                nodes, 0, max_nodes, None, deadline, cancel_token)
+            if reason:
+                raise AStar.SolveInterrupted(reason, nodes, 0)
+
+            if message[0] == "limit":
+                raise AStar.SolveInterrupted(message[1], nodes, 0)
+            elif message[0] == "solution":
+                if message[1] < best[0]:
+                    best = (message[1], message[2])
+                    for inbox in inboxes:
+                        inbox.put(("bound", best[0]))
+            elif message[0] == "idle":
+                status[message[1]] = (True, message[2], message[3])
+            elif message[0] == "probe reply" and message[1] == probe_id:
+                replies[message[2]] = (message[3], message[4], message[5])
+                status[message[2]] = replies[message[2]]
+                if len(replies) == self.workers:
+                    if replies == snapshot:
+                        if best[1] == None:
+                            raise RuntimeError("No path")
+                        return best
+                    snapshot = None
+
+            # Start a probe wave once every worker says it's idle and the counters add up.
+            if snapshot == None and len(status) == self.workers and all(idle for idle, _, _ in status.values()):
+                if sum(sent for _, sent, _ in status.values()) == sum(received for _, _, received in status.values()):
+                    probe_id += 1
+                    snapshot = dict(status)
+                    replies = {}
+                    for inbox in inboxes:
+                        inbox.put(("probe", probe_id))
+
+    def __stop_workers(self, processes: list, inboxes: list, coordinator: multiprocessing.Queue) -> List[dict]:
+        """Stop the worker processes, returns the statistics they report."""
+
+        for inbox in inboxes:
+            inbox.put(("stop",))
+
+        stats = [None] * len(processes)
+        remaining = len(processes)
+        while remaining:
+            try:
+                message = coordinator.get(timeout=1)
+            except queue.Empty:
+                break
+            if message[0] == "stats":
+                stats[message[1]] = message[2]
+                remaining -= 1
+
+        for process in processes:
+            process.join(1)
+            if process.is_alive():
+                process.terminate()
+
+        # Nothing reads the inboxes now, so don't wait for messages left in them when this process exits
+        for inbox in inboxes:
+            inbox.cancel_join_thread()
+
+        return [worker_stats for worker_stats in stats if worker_stats != None]
+
+
+def HDAStringSolver_benchmark(start: str, goal: str, core_counts: Optional[List[int]] = None):
+    """Solve the same problem with different numbers of workers and print the scaling efficiency and communication overhead."""
+
+    if core_counts == None:
+        core_counts = [1]
+        while core_counts[-1] * 2 <= multiprocessing.cpu_count():
+            core_counts.append(core_counts[-1] * 2)
+
+    print("Cores  Time (ms)  Speedup  Efficiency  Nodes expanded  States sent  Sent %  Batches")
+    base_time = None
+    for cores in core_counts:
+        solver = HDAStringSolver(start, goal, cores)
+        solver.solve()
+        time_taken = max(solver.time_taken, 1)
+        if base_time == None:
+            base_time = time_taken
+
+        expanded = sum(stats["nodes expanded"]
+                       for stats in solver.worker_stats)
+        generated = sum(stats["states generated"]
+                        for stats in solver.worker_stats)
+        sent = sum(stats["states sent"] for stats in solver.worker_stats)
+        batches = sum(stats["batches sent"] for stats in solver.worker_stats)
+        speedup = base_time / time_taken
+
+        print("{:>5}  {:>9}  {:>7.2f}  {:>10.2f}  {:>14}  {:>11}  {:>6.1f}  {:>7}".format(
+            cores, time_taken, speedup, speedup / cores, expanded, sent, 100 * sent / max(generated, 1), batches))
+    print("Path length: " + str(len(solver.path) - 1) + " swaps")
+
+
+if __name__ == "__main__":
+    HDAStringSolver_benchmark("hgfedcbaji", "abcdefghij")
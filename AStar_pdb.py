@@ -0,0 +1,407 @@
+import mmap
+import os
+import struct
+import tempfile
+import AStar
+from typing import Optional, List, Tuple
+
+# Pattern databases for string reorganisation.
+# A pattern is a list of groups of letters, every letter in a group is replaced by the same symbol and letters in no group by "*".
+# A database holds the number of swaps from every abstract string to the abstract goal, which is a lower bound on the real number.
+# Only the group sizes matter, so a database is built for the canonical goal "***AABBB..." and any goal with the same group sizes
+# is mapped onto it by moving each position to where its symbol is in the canonical goal (this doesn't change the number of swaps).
+#
+# File format
+#   Header: magic (4 bytes), version (uint16), additive (uint16), group count (uint16), length (uint32), little endian.
+#   Then the size of each group (uint32), followed by one byte per abstract string, indexed by its rank (see AStar.StringEncoder).
+# The file is opened with mmap, so the table is never parsed and can be shared by every process using it.
+
+MAGIC = b"ASPD"
+VERSION = 1
+HEADER = struct.Struct("<4sHHHI")
+WILDCARD = "*"
+
+
+def get_canonical_goal(length: int, counts: Tuple[int, ...]) -> str:
+    """Returns the abstract goal a database with the given group sizes is built for."""
+
+    groups = "".join(chr(ord("A") + num) * count for num,
+                     count in enumerate(counts))
+    return WILDCARD * (length - len(groups)) + groups
+
+
+def get_file_name(length: int, counts: Tuple[int, ...], additive: bool) -> str:
+    """Returns the file name PatternHeuristic.create uses for a database, it only depends on what the database can be used for."""
+
+    return "pdb_" + str(length) + "_" + "_".join(str(count) for count in counts) + ("_add" if additive else "_max") + ".aspd"
+
+
+def get_group_counts(goal: str, groups: List[str]) -> Tuple[int, ...]:
+    """Returns how many letters of the goal are in each group."""
+
+    return tuple(sum(goal.count(letter) for letter in group) for group in groups)
+
+
+class PatternDatabase(object):
+    """
+    Table of the number of swaps from every abstract string to the abstract goal, built with a backwards breadth first search.
+    In an additive database, swaps moving two letters of the pattern cost 1 and swaps moving one cost 1/2 (swaps moving none are free).
+    The values of additive databases with no letters in common can then be added together without over estimating the number of swaps.
+    Additive values are stored doubled so they are whole numbers, other databases store the number of swaps itself.
+        How to use:
+            Build a database with PatternDatabase.build (or from_goal), and save it with .save to reuse it.
+            PatternDatabase.load memory maps a saved database, use it as a context manager to close the file automatically.
+            Use a PatternHeuristic to look up the values for a particular goal.
+        Init parameters:
+            length (int) - The length of the strings.
+            counts (tuple) - The size of each group.
+            additive (bool) - Whether the database is additive.
+            table - The values (a bytes like object indexed by rank).
+    """
+
+    def __init__(self, length: int, counts: Tuple[int, ...], additive: bool, table):
+
+        self.length = length
+        self.counts = tuple(counts)
+        self.additive = additive
+        self.encoder = AStar.StringEncoder(get_canonical_goal(length, counts))
+        self.table = table
+        self.__mmap = None
+
+        if len(table) < self.encoder.get_permutation_count():
+            raise ValueError("Pattern database table is truncated")
+
+    @classmethod
+    def build(cls, length: int, counts: Tuple[int, ...], additive: Optional[bool] = True, max_entries: Optional[int] = 2 ** 24):
+        """
+        Build a database for strings of the given length with groups of the given sizes.
+        Raises a ValueError if there would be more than max_entries abstract strings.
+        """
+
+        if sum(counts) > length or min(counts, default=1) < 1:
+            raise ValueError("The groups don't fit in the string")
+        encoder = AStar.StringEncoder(get_canonical_goal(length, counts))
+        if encoder.get_permutation_count() > max_entries:
+            raise ValueError("Pattern database would have " +
+                             str(encoder.get_permutation_count()) + " entries")
+
+        wildcard = encoder.symbols.get(WILDCARD)
+        swaps = [(i, x) for i in range(length) for x in range(i + 1, length)]
+        goal = encoder.encode(encoder.goal)
+
+        # Search out from the goal (swaps can be undone, so this is the same as searching back to it).
+        # Additive costs are 1 or 2 (once doubled), so a list of buckets is used in place of a queue.
+        dists = {goal: 0}
+        buckets = [[goal]]
+        dist = 0
+        while dist < len(buckets):
+            for code in buckets[dist]:
+                if dists[code] != dist:
+                    continue
+                symbols = encoder.to_symbols(code)
+                for i, x in swaps:
+                    a = symbols[i]
+                    b = symbols[x]
+                    if a == b:
+                        continue
+
+                    cost = 2 if a != wildcard and b != wildcard else 1
+                    child_dist = dist + (cost if additive else 1)
+                    child = encoder.swap(code, i, x)
+                    if child in dists and dists[child] <= child_dist:
+                        continue
+                    dists[child] = child_dist
+                    while len(buckets) <= child_dist:
+                        buckets.append([])
+                    buckets[child_dist].append(child)
+            buckets[dist] = None
+            dist += 1
+
+        table = bytearray(encoder.get_permutation_count())
+        for code, dist in dists.items():
+            table[encoder.rank(code)] = min(dist, 255)
+        return cls(length, counts, additive, table)
+
+    @classmethod
+    def from_goal(cls, goal: str, groups: List[str], additive: Optional[bool] = True, max_entries: Optional[int] = 2 ** 24):
+        """Build a database for a goal and pattern (it can be used for any goal with the same group sizes)."""
+
+        return cls.build(len(goal), get_group_counts(goal, groups), additive, max_entries)
+
+    def save(self, path: str):
+        """
+        Save the database in the format described at the top of this file.
+        It is written to a temporary file which then replaces path, so other processes never load a partly written database.
+        """
+
+        handle, temp_path = tempfile.mkstemp(
+            suffix=".tmp", dir=os.path.dirname(path) or ".")
+        try:
+            with os.fdopen(handle, "wb") as pdb_file:
+                pdb_file.write(HEADER.pack(MAGIC, VERSION, int(
+                    self.additive), len(self.counts), self.length))
+                pdb_file.write(struct.pack(
+                    "<" + str(len(self.counts)) + "I", *self.counts))
+                pdb_file.write(
+                    bytes(self.table[:self.encoder.get_permutation_count()]))
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str):
+        """Memory map a database saved with .save."""
+
+        with open(path, "rb") as pdb_file:
+            data = mmap.mmap(pdb_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            if len(data) < HEADER.size:
+                raise ValueError("Not a pattern database: " + str(path))
+            magic, version, additive, group_count, length = HEADER.unpack_from(
+                data, 0)
+            counts_format = struct.Struct("<" + str(group_count) + "I")
+            if magic != MAGIC or version != VERSION or len(data) < HEADER.size + counts_format.size:
+                raise ValueError("Not a pattern database: " + str(path))
+            counts = counts_format.unpack_from(data, HEADER.size)
+
+            size = AStar.StringEncoder(get_canonical_goal(
+                length, counts)).get_permutation_count()
+            if len(data) < HEADER.size + counts_format.size + size:
+                raise ValueError("Pattern database is truncated: " + str(path))
+            database = cls(length, counts, bool(additive), memoryview(
+                data)[HEADER.size + counts_format.size:])
+        except ValueError:
+            data.close()
+            raise
+        database.__mmap = data
+        return database
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Close the memory map, if the database was loaded from a file."""
+
+        if self.__mmap != None:
+            self.table.release()
+            self.table = None
+            self.__mmap.close()
+            self.__mmap = None
+
+
+class PatternHeuristic(object):
+    """
+    Heuristic for string reorganisation from one or more pattern databases, it never over estimates the number of swaps.
+    The values of the additive databases are added together (so their patterns must not share letters),
+    and the result is the largest of that sum and the values of the other databases.
+        How to use:
+            Pass a list of (groups, database) pairs, the database must have been built for groups of the same sizes as the groups have in the goal.
+            Use PatternHeuristic.create to build (or load) databases for a goal automatically.
+        Init parameters:
+            goal (str) - The goal string.
+            databases (list) - (groups, PatternDatabase) pairs.
+    """
+
+    def __init__(self, goal: str, databases: List[Tuple[List[str], PatternDatabase]]):
+
+        self.goal = goal
+        self.databases = databases
+        self.lookups = []
+
+        used = set()
+        for groups, database in databases:
+            if database.length != len(goal) or database.counts != get_group_counts(goal, groups):
+                raise ValueError("Pattern database " + get_file_name(database.length, database.counts,
+                                                                     database.additive) + " doesn't match the pattern " + str(groups))
+
+            letters = set("".join(groups))
+            if database.additive:
+                if used & letters:
+                    raise ValueError(
+                        "Additive patterns must not share letters")
+                used |= letters
+
+            # The symbol of each letter, and the shift of each position once it is moved to the canonical goal
+            encoder = database.encoder
+            symbols = {letter: encoder.symbols.get(
+                WILDCARD, 0) for letter in goal}
+            for num, group in enumerate(groups):
+                for letter in group:
+                    symbols[letter] = encoder.symbols[chr(ord("A") + num)]
+
+            canonical_positions = {}
+            for position, char in enumerate(encoder.goal):
+                canonical_positions.setdefault(
+                    encoder.symbols[char], []).append(position)
+            shifts = []
+            for letter in goal:
+                shifts.append(encoder.shifts[canonical_positions[symbols[letter]].pop(0)])
+
+            self.lookups.append((database, symbols, shifts))
+
+    @classmethod
+    def create(cls, goal: str, max_entries: Optional[int] = 2 ** 16, directory: Optional[str] = None, cache: Optional[dict] = None):
+        """
+        Create a heuristic for a goal from additive databases, splitting the letters of the goal into patterns
+        with at most max_entries abstract strings each (letters which occur most often are placed first).
+        If a directory is given, databases are loaded from it when they exist and saved to it when they are built,
+        so they are reused by every goal with the same pattern sizes.
+        If a cache dict is given, the databases are kept in it (keyed by length and group sizes), so creating heuristics
+        for many goals in one process only builds or loads each database once.
+        """
+
+        letters = sorted(set(goal), key=lambda letter: (-goal.count(letter), letter))
+        patterns = []
+        for letter in letters:
+            if patterns:
+                groups = patterns[-1] + [letter]
+                size = AStar.StringEncoder(get_canonical_goal(
+                    len(goal), get_group_counts(goal, groups))).get_permutation_count()
+                if size <= max_entries:
+                    patterns[-1] = groups
+                    continue
+            patterns.append([letter])
+
+        if directory != None:
+            os.makedirs(directory, exist_ok=True)
+
+        databases = []
+        for groups in patterns:
+            counts = get_group_counts(goal, groups)
+            name = get_file_name(len(goal), counts, True)
+            if cache != None and (len(goal), counts) in cache:
+                database = cache[(len(goal), counts)]
+            elif directory != None and os.path.exists(os.path.join(directory, name)):
+                database = PatternDatabase.load(os.path.join(directory, name))
+            else:
+                database = PatternDatabase.build(len(goal), counts, True)
+                if directory != None:
+                    database.save(os.path.join(directory, name))
+            if cache != None:
+                cache[(len(goal), counts)] = database
+            databases.append((groups, database))
+        return cls(goal, databases)
+
+    def get_dist(self, value: str) -> int:
+        """Returns the heuristic for a string."""
+
+        total = 0
+        best = 0
+        for database, symbols, shifts in self.lookups:
+            code = 0
+            for position in range(len(value)):
+                code |= symbols[value[position]] << shifts[position]
+            dist = database.table[database.encoder.rank(code)]
+
+            if database.additive:
+                total += dist
+            elif dist > best:
+                best = dist
+        # Additive values are doubled, round the sum up as a number of swaps is a whole number
+        return max((total + 1) // 2, best)
+
+    def close(self):
+        """Close every database used by this heuristic."""
+
+        for _, database in self.databases:
+            database.close()
+
+
+class PDBStateString(AStar.State):
+    """
+    State class used by the PDBStringSolver, the distance is the number of swaps so far (g) plus the pattern database heuristic (h).
+        Init parameters:
+            value (str) - The value of this state.
+            parent (State) - This states parent.
+            start (str) - The start value for this state.
+            goal (str) - The goal value for this state.
+            heuristic (PatternHeuristic) - The heuristic, only needed by the first state (it is shared by its children).
+    """
+
+    def __init__(self, value: str, parent: Optional[AStar.State], start: Optional[str] = "", goal: Optional[str] = "", heuristic: Optional[PatternHeuristic] = None):
+
+        super(PDBStateString, self).__init__(value, parent, start, goal)
+        self.heuristic = parent.heuristic if parent else heuristic
+        self.dist = self.get_dist()
+
+    def get_dist(self) -> int:
+        """Calculate the distance of this state."""
+
+        self.g = self.parent.g + 1 if self.parent else 0
+        self.h = self.heuristic.get_dist(self.value)
+        return self.g + self.h
+
+    def create_children(self, forbidden_states: Optional[set] = set()):
+        """
+        Create the children of this state\n
+        Can optionally be passed a forbidden_states set to prevent these states from being generated.
+        """
+
+        if not self.children:
+            letters = list(self.value)
+            for i in range(len(letters)):
+                for x in range(i + 1, len(letters)):
+                    if letters[i] == letters[x]:
+                        continue
+                    letters[i], letters[x] = letters[x], letters[i]
+                    val = "".join(letters)
+                    letters[i], letters[x] = letters[x], letters[i]
+
+                    if not(val in forbidden_states):
+                        self.children.append(PDBStateString(val, self))
+
+
+class PDBStringSolver(AStar.StringSolver):
+    """
+    String solver using A* with a pattern database heuristic, which returns a path with the fewest swaps.
+        Init parameters:
+            start (str) - The starting string.
+            goal (str) - The goal string.
+            heuristic (PatternHeuristic) - The heuristic to use, if it is None one is created with PatternHeuristic.create.
+            allowed_states (set) - Any states in this set will be permitted. If it is empty, then all states will be permitted.
+            forbidden_states (set) - Any states in this set will not be permitted.
+            visited_queue (set) - A state to initalise the visited queue to, anything in this set will be ignored.
+    """
+
+    def __init__(self, start: str, goal: str, heuristic: Optional[PatternHeuristic] = None, allowed_states: Optional[set] = set(), forbidden_states: Optional[set] = set(), visited_queue: Optional[set] = set()):
+        self.heuristic = heuristic
+        super(PDBStringSolver, self).__init__(start, goal,
+                                              allowed_states, forbidden_states, visited_queue)
+
+    def get_start_state(self) -> PDBStateString:
+        """Returns the first navigation state."""
+
+        if self.heuristic == None:
+            self.heuristic = PatternHeuristic.create(self.goal)
+        return PDBStateString(self.start, 0, self.start, self.goal, self.heuristic)
+
+
+def PDBStringSolver_example():
+    import random
+    import time
+
+    goal = "aabbbccddeee"
+    letters = list(goal)
+    random.shuffle(letters)
+    start = "".join(letters)
+
+    start_time = time.time()
+    heuristic = PatternHeuristic.create(goal)
+    print("Built " + str(len(heuristic.databases)) + " databases in " +
+          str(int(round((time.time() - start_time) * 1000, 0))) + "ms")
+
+    a = PDBStringSolver(start, goal, heuristic)
+    a.solve()
+    for num, step in enumerate(a.path):
+        print(str(num) + ": " + step)
+    print("Swaps: " + str(len(a.path) - 1) + ", Time Taken: " +
+          str(a.time_taken) + ", Nodes Considered: " + str(a.nodes_considered))
+
+
+if __name__ == "__main__":
+    PDBStringSolver_example()
@@ -0,0 +1,399 @@
+import heapq
+import time
+import AStar
+from array import array
+from typing import Optional, List, Tuple
+
+# Rectangular symmetry reduction.
+# The empty areas of a grid are split into rectangles of tiles with the same cost. Any shortest path between two tiles on the edge
+# of a rectangle can be replaced by one which walks along the edge and makes at most one straight crossing, so the tiles inside
+# a rectangle are never visited. Instead each edge tile gets a macro edge straight across to the tile opposite it.
+
+
+class RectangleReduction(object):
+    """
+    Rectangle decomposition of a grid map, used by RSRSolver.
+    Moves cost the same as in Movement2DSolver (1 for straight moves and 2 for diagonal ones), multiplied by the cost of the tile moved onto.
+        How to use:
+            Create it once for a map, then keep it up to date with set_tile. Only the rectangle holding a changed tile is rebuilt.
+        Init parameters:
+            grid_map - The map to reduce (such as an AStar_map.GridMap or AStar_map.TileGrid).
+            diagonal_enabled (bool) - Whether diagonal movement is permitted.
+            forbidden_states (set) - Any extra locations which are not permitted.
+            min_size (int) - The smallest width and height of a rectangle (rectangles need a width and height of 3 to have any inside tiles).
+    """
+
+    def __init__(self, grid_map, diagonal_enabled: Optional[bool] = False, forbidden_states: Optional[set] = set(), min_size: Optional[int] = 3):
+
+        self.width = grid_map.width
+        self.height = grid_map.height
+        self.diagonal_enabled = diagonal_enabled
+        self.min_size = max(min_size, 3)
+
+        # The cost of each tile (0 is a wall), and the rectangle each tile is in (-1 for none), indexed by y * width + x.
+        self.costs = bytearray(self.width * self.height)
+        for y in range(self.height):
+            for x in range(self.width):
+                if not (x, y) in forbidden_states:
+                    self.costs[y * self.width +
+                               x] = min(grid_map.get_cost((x, y)), 255)
+        self.rect_ids = array("i", [-1]) * (self.width * self.height)
+        # Rectangle id: (x, y, width, height)
+        self.rectangles = {}
+        self.next_id = 0
+
+        self.moves = AStar.DIAGONAL_MOVES if diagonal_enabled else AStar.STRAIGHT_MOVES
+        self.__decompose(0, 0, self.width, self.height)
+
+    def get_cost(self, coords: Tuple[int, int]) -> int:
+        """Returns the cost of entering the tile at coords, 0 means the tile is a wall."""
+
+        if not (0 <= coords[0] < self.width and 0 <= coords[1] < self.height):
+            return 0
+        return self.costs[coords[1] * self.width + coords[0]]
+
+    def get_rectangle(self, coords: Tuple[int, int]) -> Optional[Tuple[int, int, int, int]]:
+        """Returns the (x, y, width, height) of the rectangle holding a tile, or None if it isn't in one."""
+
+        rect_id = self.rect_ids[coords[1] * self.width + coords[0]]
+        return self.rectangles[rect_id] if rect_id != -1 else None
+
+    def is_inside(self, coords: Tuple[int, int]) -> bool:
+        """Returns whether a tile is inside a rectangle (rather than on its edge or in none), these tiles are skipped by the search."""
+
+        rect = self.get_rectangle(coords)
+        if rect == None:
+            return False
+        x, y, width, height = rect
+        return x < coords[0] < x + width - 1 and y < coords[1] < y + height - 1
+
+    def get_pruned_count(self) -> int:
+        """Returns the number of tiles skipped by the search."""
+
+        return sum((width - 2) * (height - 2) for _, _, width, height in self.rectangles.values())
+
+    def set_tile(self, coords: Tuple[int, int], cost: int):
+        """Change the cost of a tile (0 makes it a wall), the rectangle holding it is split up again."""
+
+        if not (0 <= coords[0] < self.width and 0 <= coords[1] < self.height):
+            return
+        index = coords[1] * self.width + coords[0]
+        cost = min(cost, 255)
+        if self.costs[index] == cost:
+            return
+
+        area = (coords[0], coords[1], 1, 1)
+        rect_id = self.rect_ids[index]
+        if rect_id != -1:
+            # Remove the rectangle, then split the tiles it held into new rectangles
+            area = self.rectangles.pop(rect_id)
+            x, y, width, height = area
+            for row in range(y, y + height):
+                for column in range(x, x + width):
+                    self.rect_ids[row * self.width + column] = -1
+
+        self.costs[index] = cost
+        x, y, width, height = area
+        self.__decompose(x, y, x + width, y + height)
+
+    def __is_free(self, x: int, y: int, cost: int) -> bool:
+        """Returns whether a tile can be added to a rectangle of tiles with the given cost."""
+
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return False
+        index = y * self.width + x
+        return self.costs[index] == cost and self.rect_ids[index] == -1
+
+    def __decompose(self, x_start: int, y_start: int, x_end: int, y_end: int):
+        """Greedily cover the tiles of an area which aren't in a rectangle with rectangles (which may reach outside of the area)."""
+
+        for y in range(y_start, y_end):
+            for x in range(x_start, x_end):
+                cost = self.costs[y * self.width + x]
+                if not cost or not self.__is_free(x, y, cost):
+                    continue
+
+                # Grow a square from this corner, then stretch it to the right and down as far as it will go
+                size = 1
+                while all(self.__is_free(x + size, row, cost) for row in range(y, y + size + 1)) and all(
+                        self.__is_free(column, y + size, cost) for column in range(x, x + size)):
+                    size += 1
+                width = size
+                height = size
+                while all(self.__is_free(x + width, row, cost) for row in range(y, y + height)):
+                    width += 1
+                while all(self.__is_free(column, y + height, cost) for column in range(x, x + width)):
+                    height += 1
+
+                if width < self.min_size or height < self.min_size:
+                    continue
+
+                rect_id = self.next_id
+                self.next_id += 1
+                self.rectangles[rect_id] = (x, y, width, height)
+                for row in range(y, y + height):
+                    for column in range(x, x + width):
+                        self.rect_ids[row * self.width + column] = rect_id
+
+    def get_neighbours(self, coords: Tuple[int, int]):
+        """
+        Yields the (coords, cost) moves which can be made from a tile that isn't inside a rectangle.
+        Tiles on the edge of a rectangle can move along the edge, straight across the rectangle or to tiles outside of it.
+        """
+
+        x, y = coords
+        rect = self.get_rectangle(coords)
+
+        for move_x, move_y, move_cost in self.moves:
+            neighbour = (x + move_x, y + move_y)
+            cost = self.get_cost(neighbour)
+            if not cost:
+                continue
+            if rect != None and self.get_rectangle(neighbour) == rect:
+                # Inside the rectangle only straight moves along its edge are needed
+                if move_cost != 1 or self.is_inside(neighbour):
+                    continue
+            yield neighbour, cost * move_cost
+
+        if rect != None:
+            rect_x, rect_y, width, height = rect
+            cost = self.costs[y * self.width + x]
+            right = rect_x + width - 1
+            bottom = rect_y + height - 1
+            # Macro edges across the rectangle (corners can reach the opposite corners by walking along the edge)
+            if rect_x < x < right:
+                if y == rect_y:
+                    yield (x, bottom), cost * (height - 1)
+                elif y == bottom:
+                    yield (x, rect_y), cost * (height - 1)
+            if rect_y < y < bottom:
+                if x == rect_x:
+                    yield (right, y), cost * (width - 1)
+                elif x == right:
+                    yield (rect_x, y), cost * (width - 1)
+
+    def get_projections(self, coords: Tuple[int, int]) -> List[Tuple[Tuple[int, int], int]]:
+        """Returns the (coords, cost) of the four edge tiles straight up, down, left and right of a tile inside a rectangle."""
+
+        rect_x, rect_y, width, height = self.get_rectangle(coords)
+        x, y = coords
+        cost = self.costs[y * self.width + x]
+        return [((x, rect_y), cost * (y - rect_y)), ((x, rect_y + height - 1), cost * (rect_y + height - 1 - y)),
+                ((rect_x, y), cost * (x - rect_x)), ((rect_x + width - 1, y), cost * (rect_x + width - 1 - x))]
+
+
+class RSRSolver(AStar.AStarSolver):
+    """
+    A* solver for movement on a 2D grid, searching the reduced graph of a RectangleReduction. The path returned has the lowest cost,
+    and lists every tile moved through (macro edges are filled back in).
+        Init parameters:
+            reduction (RectangleReduction) - The reduced map to solve on.
+            start (tuple) - The starting coordinates.
+            goal (tuple) - The goal coordinates.
+    """
+
+    def __init__(self, reduction: RectangleReduction, start: Tuple[int, int], goal: Tuple[int, int]):
+        super(RSRSolver, self).__init__(tuple(start), tuple(goal))
+        self.reduction = reduction
+        if not self.validate():
+            raise Exception("Invalid inputs")
+        self.cost = 0
+        # If this is set to a AStar_components.ComponentIndex of the map, queries between unconnected tiles are rejected without searching
+        self.components = None
+
+    def is_reachable(self) -> bool:
+        """Returns False if the component index shows the start and goal aren't connected."""
+
+        return self.components == None or self.components.is_connected(self.start, self.goal)
+
+    def validate(self) -> bool:
+        """Method for validating the starting information given to the solver."""
+
+        return self.reduction.get_cost(self.start) != 0 and self.reduction.get_cost(self.goal) != 0
+
+    def get_dist(self, coords: Tuple[int, int]) -> int:
+        """Returns the heuristic distance from a tile to the goal."""
+
+        return abs(coords[0] - self.goal[0]) + abs(coords[1] - self.goal[1])
+
+    def begin(self):
+        """
+        Set up the search, this is called by the first call to step (or solve).
+        """
+
+        if not self.is_reachable():
+            raise RuntimeError("No path")
+
+        # Tiles inside a rectangle are joined to the edge tiles straight out from them
+        self.goal_entries = {}
+        if self.reduction.is_inside(self.goal):
+            for entry, cost in self.reduction.get_projections(self.goal):
+                self.goal_entries[entry] = cost
+
+        self.visited_queue = set()
+        self.g = {self.start: 0}
+        self.parents = {self.start: None}
+        self.open_list = [(self.get_dist(self.start), 0, self.start)]
+        # The (heuristic, tile) of the expanded tile closest to the goal, reported if the search is stopped
+        self.best = (self.get_dist(self.start), self.start)
+        self.search_started = True
+        self.expanded = 0
+
+    def step(self, max_expansions: Optional[int] = None, max_nodes: Optional[int] = None, max_memory: Optional[int] = None, deadline: Optional[float] = None, cancel_token=None) -> bool:
+        """
+        Carry on the search for at most max_expansions nodes, the search state is kept between calls (see AStarSolver.step).\n
+        The total cost of the path is stored in the .cost attribute, and the tiles expanded are added to .visited_queue.
+        """
+
+        if self.path:
+            return True
+        if not self.search_started:
+            self.begin()
+
+        start_time = time.time()
+        reduction = self.reduction
+        start = self.start
+        goal = self.goal
+        closed = self.visited_queue
+        goal_entries = self.goal_entries
+        g = self.g
+        parents = self.parents
+        open_list = self.open_list
+        count = self.nodes_considered
+        expanded = self.expanded
+        best = self.best
+        expansions = 0
+
+        try:
+            while open_list:
+                if max_expansions != None and expansions >= max_expansions:
+                    return False
+
+                reason = self.check_limits(
+                    count, expanded, max_nodes, max_memory, deadline, cancel_token)
+                if reason:
+                    best_state = AStar.State(best[1], 0, start, goal)
+                    best_state.h = best[0]
+                    best_state.path = self.__build_path(best[1])
+                    raise AStar.SolveInterrupted(reason, count, int(
+                        round((self.time_spent + time.time() - start_time) * 1000, 0)), best_state)
+
+                node_f, node_g, node = open_list[0]
+                if node == goal:
+                    break
+                heapq.heappop(open_list)
+                if node in closed:
+                    continue
+                closed.add(node)
+                expanded += 1
+                expansions += 1
+                if node_f - node_g < best[0]:
+                    best = (node_f - node_g, node)
+                if self.trace != None:
+                    self.trace.record(node, node_f, node_g)
+
+                if node == start and reduction.is_inside(start):
+                    neighbours = reduction.get_projections(start)
+                    if reduction.get_rectangle(start) == reduction.get_rectangle(goal):
+                        # The straight line cost between two tiles of a rectangle
+                        neighbours.append((goal, reduction.get_cost(goal) * (
+                            abs(goal[0] - start[0]) + abs(goal[1] - start[1]))))
+                else:
+                    neighbours = reduction.get_neighbours(node)
+                    if node in goal_entries:
+                        neighbours = list(neighbours) + \
+                            [(goal, goal_entries[node])]
+
+                for neighbour, cost in neighbours:
+                    neighbour_g = node_g + cost
+                    if neighbour in closed or neighbour_g >= g.get(neighbour, neighbour_g + 1):
+                        continue
+                    g[neighbour] = neighbour_g
+                    parents[neighbour] = node
+                    count += 1
+                    heapq.heappush(
+                        open_list, (neighbour_g + self.get_dist(neighbour), neighbour_g, neighbour))
+
+                self.nodes_considered = count
+                self.update()
+        finally:
+            # Save the search state so it can be carried on by the next call
+            self.nodes_considered = count
+            self.expanded = expanded
+            self.best = best
+            self.time_spent += time.time() - start_time
+            self.time_taken = int(round(self.time_spent * 1000, 0))
+
+        if not goal in g:
+            raise RuntimeError("No path")
+
+        self.cost = g[goal]
+        self.path = self.__build_path(goal)
+        return True
+
+    def __build_path(self, node: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Follow the parents back from a reached tile, filling in the tiles crossed by each macro edge.
+        Every longer edge is a straight line, apart from the one between a start and goal in the same rectangle (which moves along x then y).
+        """
+
+        parents = self.parents
+        path = [node]
+        while parents[node] != None:
+            parent = parents[node]
+            move = (abs(parent[0] - node[0]), abs(parent[1] - node[1]))
+            if sum(move) == 1 or (self.reduction.diagonal_enabled and move == (1, 1)):
+                path.append(parent)
+            while path[-1] != parent:
+                x, y = path[-1]
+                if y != parent[1]:
+                    y += 1 if parent[1] > y else -1
+                else:
+                    x += 1 if parent[0] > x else -1
+                path.append((x, y))
+            node = parent
+        path.reverse()
+        return path
+
+    def get_frontier(self) -> list:
+        """Returns the tiles waiting to be expanded (the open list), in no particular order."""
+
+        return [item[2] for item in self.open_list if not item[2] in self.visited_queue]
+
+
+def RSRSolver_example():
+    import random
+    import AStar_map
+
+    # A map of rooms separated by walls with gaps in them
+    size = 120
+    tiles = [[0] * size for _ in range(size)]
+    for wall in range(20, size, 30):
+        for num in range(size):
+            tiles[wall][num] = 1
+            tiles[num][wall] = 1
+        for _ in range(6):
+            tiles[wall][random.randrange(size)] = 0
+            tiles[random.randrange(size)][wall] = 0
+
+    grid = AStar_map.TileGrid(tiles)
+    reduction = RectangleReduction(grid)
+    print("Rectangles: " + str(len(reduction.rectangles)) + ", Tiles skipped: " +
+          str(reduction.get_pruned_count()) + "/" + str(size * size))
+
+    a = RSRSolver(reduction, (0, 0), (size - 1, size - 1))
+    a.solve()
+    print("Reduced, cost: " + str(a.cost) + ", Time Taken: " + str(a.time_taken) +
+          ", Nodes Considered: " + str(a.nodes_considered) + ", Nodes Expanded: " + str(len(a.visited_queue)))
+
+    forbidden_states = set((x, y) for x in range(-1, size + 1) for y in range(-1, size + 1)
+                           if not grid.is_passable((x, y)))
+    b = AStar.Movement2DSolver((0, 0), (size - 1, size - 1),
+                               False, set(), forbidden_states)
+    b.solve()
+    print("Movement2DSolver, cost: " + str(len(b.path) - 1) + ", Time Taken: " + str(b.time_taken) +
+          ", Nodes Considered: " + str(b.nodes_considered))
+
+
+if __name__ == "__main__":
+    RSRSolver_example()
@@ -0,0 +1,120 @@
+import struct
+import sys
+import time
+from array import array
+from typing import Optional, Dict
+
+# File format
+# A trace file is a header followed by the recorded expansions, stored as one array after another.
+#   Header: magic (4 bytes), version (uint16), dimensions (uint16), expansion count (int64), little endian.
+#   Arrays: values (int32, dimensions per expansion), f (float64), g (float64), timestamps (float64, seconds since the first expansion), also little endian.
+
+MAGIC = b"ASTR"
+VERSION = 1
+HEADER = struct.Struct("<4sHHq")
+
+
+class SearchTrace(object):
+    """
+    Compact record of the nodes expanded by a search, in the order they were expanded.
+        How to use:
+            Set the .trace attribute of a solver to a SearchTrace before solving, every expanded node is then recorded.
+            Values must be integers (dimensions = 1) or tuples of integers (such as the coordinates used by Movement2DSolver).
+            The trace can be saved with .save and loaded again with SearchTrace.load, then replayed by MapCreationWindow.
+        Init parameters:
+            dimensions (int) - The number of integers in each value.
+    """
+
+    def __init__(self, dimensions: Optional[int] = 2):
+
+        self.dimensions = dimensions
+        self.values = array("i")
+        self.f = array("d")
+        self.g = array("d")
+        self.timestamps = array("d")
+        self.__start_time = None
+
+    def __len__(self) -> int:
+        return len(self.f)
+
+    def record(self, value, f: float, g: float):
+        """Record an expanded node."""
+
+        now = time.perf_counter()
+        if self.__start_time == None:
+            self.__start_time = now
+
+        if self.dimensions == 1:
+            self.values.append(value)
+        else:
+            self.values.extend(value)
+        self.f.append(f)
+        self.g.append(g)
+        self.timestamps.append(now - self.__start_time)
+
+    def get_value(self, index: int):
+        """Returns the value expanded at the given index."""
+
+        if self.dimensions == 1:
+            return self.values[index]
+        start = index * self.dimensions
+        return tuple(self.values[start:start + self.dimensions])
+
+    def get_first_expansions(self) -> Dict[object, int]:
+        """Returns a dict of the index each value was first expanded at."""
+
+        first = {}
+        for index in range(len(self)):
+            value = self.get_value(index)
+            if value not in first:
+                first[value] = index
+        return first
+
+    def to_bytes(self) -> bytes:
+        """Returns the trace in the file format described at the top of this file."""
+
+        data = [HEADER.pack(MAGIC, VERSION, self.dimensions, len(self))]
+        for values in (self.values, self.f, self.g, self.timestamps):
+            # Arrays are written in the byte order of the machine, so swap them on big endian machines
+            if sys.byteorder == "big":
+                values = array(values.typecode, values)
+                values.byteswap()
+            data.append(values.tobytes())
+        return b"".join(data)
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        """Create a trace from the output of to_bytes."""
+
+        if len(data) < HEADER.size:
+            raise ValueError("Not a search trace")
+        magic, version, dimensions, count = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a search trace")
+
+        trace = cls(dimensions)
+        position = HEADER.size
+        for values, length in ((trace.values, count * dimensions), (trace.f, count), (trace.g, count), (trace.timestamps, count)):
+            size = values.itemsize * length
+            if position + size > len(data):
+                raise ValueError("Search trace is truncated")
+            values.frombytes(data[position:position + size])
+            position += size
+
+        if sys.byteorder == "big":
+            for values in (trace.values, trace.f, trace.g, trace.timestamps):
+                values.byteswap()
+        return trace
+
+    def save(self, path: str):
+        """Save the trace to a file."""
+
+        with open(path, "wb") as trace_file:
+            trace_file.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str):
+        """Load a trace saved with .save."""
+
+        with open(path, "rb") as trace_file:
+            return cls.from_bytes(trace_file.read())
@@ -1,12 +1,34 @@
 #!/usr/bin/python3
-import pygame
 import multiprocessing
+import AStar
 import AStar_multiprocessing
-import tkinter as tk
-from tkinter import messagebox as ms_box
+import AStar_map
+import AStar_graph
+import AStar_trace
 from typing import Optional, Dict, Tuple
 import sys
 
+# The number of nodes each search expands per frame while a replay is being recorded (see MapCreationWindow.record_replay).
+REPLAY_SLICE = 500
+
+# The GUI libraries are imported by import_gui when a window is first created, so this file can be imported without a display.
+pygame = None
+tk = None
+ms_box = None
+filedialog = None
+
+
+def import_gui() -> None:
+    """Import pygame and tkinter (does nothing if they have already been imported)."""
+
+    global pygame, tk, ms_box, filedialog
+
+    if pygame == None:
+        import pygame
+        import tkinter as tk
+        from tkinter import messagebox as ms_box
+        from tkinter import filedialog
+
 
 class DefineSettings(object):
     """
@@ -17,6 +39,8 @@ class DefineSettings(object):
 
     def __init__(self, settings: Optional[Dict]):
 
+        import_gui()
+
         # Window - The tkinter display window.
         self.window = tk.Tk()
 
@@ -32,7 +56,8 @@ class DefineSettings(object):
                     "y": 50
                 },
                 "draw progress": tk.BooleanVar(self.window, True),
-                "diagonal enabled": tk.BooleanVar(self.window, True)
+                "diagonal enabled": tk.BooleanVar(self.window, True),
+                "reduce rooms": tk.BooleanVar(self.window, False)
             }
         # If Settings alredy contains some values, just replace the draw progress
         # and diagonal settings with the matching tk boolean variable.
@@ -42,6 +67,8 @@ class DefineSettings(object):
                 self.window, settings["draw progress"])
             self.settings["diagonal enabled"] = tk.BooleanVar(
                 self.window, settings["diagonal enabled"])
+            self.settings["reduce rooms"] = tk.BooleanVar(
+                self.window, settings["reduce rooms"])
 
         # Tile size input
         tile_size_label = tk.Label(self.window, text="Tile size: ")
@@ -85,15 +112,23 @@ class DefineSettings(object):
         diagonal_enabled_label = tk.Label(self.window, text="Diagonal?")
         diagonal_enabled_label.grid(column=1, row=4, sticky=tk.E)
 
+        # Reduce rooms (solve with rectangular symmetry reduction, see AStar_rsr)
+        reduce_rooms_checkbox = tk.Checkbutton(
+            self.window, variable=self.settings["reduce rooms"], onvalue=True, offvalue=False)
+        reduce_rooms_checkbox.grid(column=2, row=5, sticky=tk.W)
+
+        reduce_rooms_label = tk.Label(self.window, text="Reduce rooms?")
+        reduce_rooms_label.grid(column=1, row=5, sticky=tk.E)
+
         # Buttons
         submit_button = tk.Button(
             self.window, text="Generate", command=lambda: self.__submit())
-        submit_button.grid(column=2, row=5, columnspan=2,
+        submit_button.grid(column=2, row=6, columnspan=2,
                            sticky=tk.W, padx=(0, 20), pady=(10, 20))
 
         cancel_button = tk.Button(
             self.window, text="Cancel", command=lambda: self.__quit())
-        cancel_button.grid(column=0, row=5, columnspan=2,
+        cancel_button.grid(column=0, row=6, columnspan=2,
                            sticky=tk.E, padx=(20, 0), pady=(10, 20))
 
         # Set window attributes
@@ -113,6 +148,7 @@ class DefineSettings(object):
             grid_size_y = int(self.grid_size_input[1].get())
             draw_all = self.settings["draw progress"].get()
             diagonal_enabled = self.settings["diagonal enabled"].get()
+            reduce_rooms = self.settings["reduce rooms"].get()
             self.settings = {
                 "tile size": tile_size,
                 "grid size": {
@@ -120,7 +156,8 @@ class DefineSettings(object):
                     "y": grid_size_y
                 },
                 "draw progress": draw_all,
-                "diagonal enabled": diagonal_enabled
+                "diagonal enabled": diagonal_enabled,
+                "reduce rooms": reduce_rooms
             }
 
             # If the settings are updated successfully, close this window.
@@ -159,6 +196,8 @@ class MapCreationWindow(object):
 
     def __init__(self, settings: dict):
 
+        import_gui()
+
         # Init pygame
         pygame.init()
         pygame.font.init()
@@ -175,6 +214,15 @@ class MapCreationWindow(object):
         # Initalise the multiprocessing manager (used for shared memory with the solving process)
         self.Manager = multiprocessing.Manager()
 
+        # Start the solver service, it is kept running (with the current map loaded) until the window is closed.
+        self.solver_service = AStar_multiprocessing.Movement2DService(
+            self.generate_base_forbidden(), (self.__x_tiles, self.__y_tiles))
+        self.solver_service.start()
+        # Empty rooms are reduced to their edges (see AStar_rsr), the service updates the reduction as tiles are changed.
+        if settings["reduce rooms"]:
+            self.solver_service.use_reduction(
+                (self.__x_tiles, self.__y_tiles))
+
         # Initalise the pygame window
         self.windowSize = (self.__x_tiles * self.__tileSize + self.__borderSize,
                            self.__y_tiles * self.__tileSize + self.__borderSize + self.__controlPanelSize)
@@ -189,10 +237,12 @@ class MapCreationWindow(object):
 
         # This variable is used to itterate the navigation node number, so that the order of placement can be found.
         self.node_num = 0
-        self.Process = None
+        self.solving = False
+        # The recorded searches being replayed (see start_replay), None when not replaying.
+        self.replay = None
         self.shared_memory = self.Manager.dict({
             "visited": set(),
-            "path": set(),
+            "path": None,
             "nodes considered": 0,
             "time taken": 0
         })
@@ -202,6 +252,35 @@ class MapCreationWindow(object):
         self.__tiles = [[0 for _ in range(self.__x_tiles)]
                         for _ in range(self.__y_tiles)]
 
+        # Stop any running solve, and give the solver service the empty map.
+        self.solver_service.cancel()
+        self.solver_service.load_map(self.generate_base_forbidden())
+
+    def generate_base_forbidden(self) -> set:
+        """
+        Returns the base of the forbidden list (forms a barrier around the arena to prevent pathfinding around obstacles).\n
+        Actually generates a wall which is 1 tile outside of the board space.
+        """
+
+        forbidden = set()
+        for x in range(-1, self.__x_tiles + 1):
+            forbidden.add((x, self.__y_tiles))
+            forbidden.add((x, -1))
+        for y in range(-1, self.__y_tiles + 1):
+            forbidden.add((self.__x_tiles, y))
+            forbidden.add((-1, y))
+
+        return forbidden
+
+    def __set_tile(self, tile_pos: tuple, value: int) -> None:
+        """Set the value of a tile, and send the change to the solver service if it changes whether the tile is passable."""
+
+        old_value = self.__tiles[tile_pos[0]][tile_pos[1]]
+        self.__tiles[tile_pos[0]][tile_pos[1]] = value
+
+        if (old_value == 1) != (value == 1):
+            self.solver_service.set_tile(tile_pos, value != 1)
+
     def get_tile_coords(self, pos: tuple) -> tuple:
         """When given an x and y coordinate in the form (x,y) will return the coords of the tile that occupies that space."""
 
@@ -213,7 +292,7 @@ class MapCreationWindow(object):
         """Handles mouse actions."""
 
         # Prevent editing the grid after the route has been generated.
-        if len(self.shared_memory["visited"]) == 0:
+        if len(self.shared_memory["visited"]) == 0 and self.replay == None:
             mouse_presses = pygame.mouse.get_pressed()
             mouse_position = pygame.mouse.get_pos()
             tile_pos = self.get_tile_coords(mouse_position)
@@ -223,90 +302,254 @@ class MapCreationWindow(object):
 
                 # If user left clicks on a tile, hide it
                 if mouse_presses[0]:
-                    self.__tiles[tile_pos[0]][tile_pos[1]] = 1
+                    self.__set_tile(tile_pos, 1)
                 # If a user middle clicks on the tile, make it into a nav node, add the node_num to store the order of placement
                 elif mouse_presses[1]:
-                    self.__tiles[tile_pos[0]][tile_pos[1]] = 2 + self.node_num
+                    self.__set_tile(tile_pos, 2 + self.node_num)
                     self.node_num += 1
                 # If a user right clicks on a tile, reset it to the default state
                 elif mouse_presses[2]:
-                    self.__tiles[tile_pos[0]][tile_pos[1]] = 0
+                    self.__set_tile(tile_pos, 0)
 
     def __key_handler(self) -> None:
         """Handles key actions."""
 
         key_presses = pygame.key.get_pressed()
         if key_presses[pygame.K_r]:
+            # Reset also cancels the running query (see reset)
             self.reset()
         elif key_presses[pygame.K_ESCAPE]:
             self.close()
+        elif self.solving or self.replay != None:
+            # The map can't be changed or solved again until the query finishes or the replay is reset.
+            return
         elif key_presses[pygame.K_RETURN]:
             self.start_pathfinding()
+        elif key_presses[pygame.K_t]:
+            self.start_replay()
+        elif key_presses[pygame.K_s]:
+            self.save_map()
+        elif key_presses[pygame.K_l]:
+            self.load_map()
+
+    def __show_warning(self, message: str, title: str) -> None:
+        """Display a warning message box."""
+
+        temp = tk.Tk()
+        messagebox = ms_box.Message(temp, message=message,
+                                    title=title, type=ms_box.OK, icon=ms_box.WARNING)
+        temp.withdraw()
+        messagebox.show()
+        temp.destroy()
+
+    def save_map(self) -> None:
+        """Ask the user for a file and save the walls of the map to it (see AStar_map for the file format)."""
+
+        temp = tk.Tk()
+        temp.withdraw()
+        path = filedialog.asksaveasfilename(
+            parent=temp, title="Save map", defaultextension=".astm", filetypes=[("A* map", "*.astm")])
+        temp.destroy()
+
+        if path:
+            # Only the walls are saved, navigation nodes and progress are treated as empty tiles.
+            tiles = [[1 if tile_value == 1 else 0 for tile_value in column]
+                     for column in self.__tiles]
+            try:
+                AStar_map.save_tiles(path, tiles)
+            except OSError as e:
+                self.__show_warning(str(e), "Save error")
+
+    def load_map(self) -> None:
+        """Ask the user for a map file and load its walls, the map must be the same size as the grid."""
+
+        temp = tk.Tk()
+        temp.withdraw()
+        path = filedialog.askopenfilename(
+            parent=temp, title="Load map", filetypes=[("A* map", "*.astm")])
+        temp.destroy()
+
+        if path:
+            try:
+                tiles = AStar_map.load_tiles(path)
+            except (OSError, ValueError) as e:
+                self.__show_warning(str(e), "Load error")
+                return
+
+            if len(tiles) != len(self.__tiles) or len(tiles[0]) != len(self.__tiles[0]):
+                self.__show_warning(
+                    "The map is not the same size as the grid.", "Load error")
+                return
+
+            self.reset()
+            self.__tiles = tiles
+
+            forbidden_set = self.generate_base_forbidden()
+            for x in range(len(tiles)):
+                for y in range(len(tiles[x])):
+                    if tiles[x][y] == 1:
+                        forbidden_set.add((x, y))
+            self.solver_service.load_map(forbidden_set)
+
+    def __get_query(self):
+        """
+        Returns the (nav_nodes, forbidden_set) of the current map, with the nav nodes in the order they were placed.
+        If there are not exactly 2 nav nodes, an error message is displayed and None is returned.
+        """
+
+        forbidden_set = self.generate_base_forbidden()
+        nav_nodes = []
+
+        # Go thorugh the tiles on screen, assigning each to an appropriate group
+        # Tiles with a value of 1 are not allowed, all else are.
+        # Any tiles with a value of 2 or more are navigation nodes (there should only be 2.)
+        for x in range(len(self.__tiles)):
+            for y in range(len(self.__tiles[x])):
+                tile_value = self.__tiles[x][y]
+                tile_coords = (x, y)
+
+                if tile_value == 1:
+                    forbidden_set.add(tile_coords)
+                elif tile_value >= 2:
+                    nav_nodes.append(tile_coords)
+
+        # If the user has not created enough nav_nodes (or too many), display an error message and do not continue.
+        if len(nav_nodes) != 2:
+            temp = tk.Tk()
+            messagebox = ms_box.Message(temp, message="You must create exactly 2 navigation nodes (middle click).",
+                                        title="Input error", type=ms_box.OK, icon=ms_box.WARNING)
+            temp.withdraw()
+            messagebox.show()
+            return None
+
+        # Sort the nav_nodes list to obtain the order of them.
+        nav_nodes = sorted(
+            nav_nodes, key=lambda coords: self.__tiles[coords[0]][coords[1]])
+        return nav_nodes, forbidden_set
 
     def start_pathfinding(self):
         """Initialise the A* pathfinding algorithm"""
 
-        def generate_base_forbidden() -> set:
-            """
-            Returns the base of the forbidden list (forms a barrier around the arena to prevent pathfinding around obstacles).\n
-            Actually generates a wall which is 1 tile outside of the board space.
-            """
-
-            forbidden = set()
-            for x in range(-1, self.__x_tiles + 1):
-                forbidden.add((x, self.__y_tiles))
-                forbidden.add((x, -1))
-            for y in range(-1, self.__y_tiles + 1):
-                forbidden.add((self.__x_tiles, y))
-                forbidden.add((-1, y))
-
-            return forbidden
-
         # If the solving process hasn't already been initiated
-        if self.Process == None:
-            allowed_set = set()
-            forbidden_set = generate_base_forbidden()
-            nav_nodes = []
-
-            # Go thorugh the tiles on screen, assigning each to an appropriate group
-            # Tiles with a value of 1 are not allowed, all else are.
-            # Any tiles with a value of 2 or more are navigation nodes (there should only be 2.)
-            for x in range(len(self.__tiles)):
-                for y in range(len(self.__tiles[x])):
-                    tile_value = self.__tiles[x][y]
-                    tile_coords = (x, y)
+        if not self.solving:
+            query = self.__get_query()
+            if query != None:
+                nav_nodes, forbidden_set = query
 
-                    if tile_value == 1:
-                        forbidden_set.add(tile_coords)
-                    else:
-                        allowed_set.add(tile_coords)
-                        if tile_value >= 2:
-                            nav_nodes.append(tile_coords)
-
-            # If the user has not created enough nav_nodes (or too many), display an error message and do not continue.
-            if len(nav_nodes) != 2:
-                temp = tk.Tk()
-                messagebox = ms_box.Message(temp, message="You must create exactly 2 navigation nodes (middle click).",
-                                            title="Input error", type=ms_box.OK, icon=ms_box.WARNING)
-                temp.withdraw()
-                messagebox.show()
-            else:
                 # Add the forbidden and nav tiles to the updated tiles, so they are not changed by the update_tiles method.
                 self.updated_tiles = forbidden_set.copy()
                 self.updated_tiles = self.updated_tiles.union(nav_nodes)
 
-                # Sort the nav_nodes list to obtain the order of them.
-                nav_nodes = sorted(
-                    nav_nodes, key=lambda coords: self.__tiles[coords[0]][coords[1]])
-
-                # Create and start process
-                self.Process = AStar_multiprocessing.Movement2DProcess(
-                    nav_nodes[0], nav_nodes[1], self.shared_memory, allowed_set, forbidden_set, self.diagonal_enabled)
-                self.Process.start()
+                # Send the query to the solver service (it already has the map).
+                self.solving = True
+                self.shared_memory["path"] = None
+                self.solver_service.solve(
+                    self.shared_memory, nav_nodes[0], nav_nodes[1], self.diagonal_enabled)
+
+    def start_replay(self):
+        """
+        Solve the map with A* and Dijkstra while recording their searches, then replay the recordings side by side.
+        The searches are run a slice at a time between frames (see record_replay), so the window keeps responding while they are recorded.
+        Tiles expanded by A* are drawn blue, those expanded by Dijkstra yellow and those expanded by both purple.
+        """
+
+        query = self.__get_query()
+        if query == None:
+            return
+        nav_nodes, forbidden_set = query
+
+        # A* on the map, and Dijkstra on the same map converted into a graph (node ids are y * width + x).
+        grid = AStar_map.TileGrid(self.__tiles)
+        a_star = AStar.Movement2DSolver(
+            nav_nodes[0], nav_nodes[1], self.diagonal_enabled, set(), forbidden_set)
+        a_star.trace = AStar_trace.SearchTrace(2)
+        dijkstra = AStar_graph.GraphSolver(AStar_graph.CSRGraph.from_grid(grid, self.diagonal_enabled), nav_nodes[0][1] * grid.width + nav_nodes[0][0],
+                                           nav_nodes[1][1] * grid.width + nav_nodes[1][0], use_heuristic=False)
+        dijkstra.trace = AStar_trace.SearchTrace(1)
+
+        # The replay starts once both searches have finished, until then it is only recording.
+        self.replay = {
+            "names": ("A*", "Dijkstra"),
+            "solvers": (a_star, dijkstra),
+            "traces": (a_star.trace, dijkstra.trace),
+            "paths": [None, None],
+            "width": grid.width,
+            "recording": True
+        }
+
+    def record_replay(self) -> None:
+        """Carry on the searches being recorded for the replay by one slice each, and start the replay once both have finished."""
+
+        replay = self.replay
+        for index, solver in enumerate(replay["solvers"]):
+            if replay["paths"][index] != None:
+                continue
+            try:
+                if solver.step(REPLAY_SLICE):
+                    replay["paths"][index] = solver.path
+            except RuntimeError:
+                replay["paths"][index] = []
+
+        if None in replay["paths"]:
+            return
+
+        width = replay["width"]
+        a_star_trace, dijkstra_trace = replay["traces"]
+        paths = replay["paths"]
+        paths[1] = [(node % width, node // width) for node in paths[1]]
+
+        first_expansions = [a_star_trace.get_first_expansions(), {}]
+        for node, index in dijkstra_trace.get_first_expansions().items():
+            first_expansions[1][(node % width, node // width)] = index
+
+        self.replay = {
+            "names": replay["names"],
+            "traces": replay["traces"],
+            "first expansions": first_expansions,
+            "paths": paths,
+            "length": max(len(a_star_trace), len(dijkstra_trace)),
+            "position": 0,
+            "speed": 1,
+            "playing": True,
+            "recording": False
+        }
+
+    def __replay_key_handler(self, key) -> None:
+        """
+        Handles key presses while replaying.
+        Space pauses, left and right scrub through the replay, up and down change the speed and home goes back to the start.
+        """
+
+        replay = self.replay
+        if replay["recording"]:
+            return
+        elif key == pygame.K_SPACE:
+            replay["playing"] = not replay["playing"]
+        elif key == pygame.K_UP:
+            replay["speed"] = min(replay["speed"] * 2, 1024)
+        elif key == pygame.K_DOWN:
+            replay["speed"] = max(replay["speed"] / 2, 1 / 16)
+        elif key in (pygame.K_LEFT, pygame.K_RIGHT):
+            # Scrub by a twentieth of the replay
+            step = max(replay["length"] // 20, 1)
+            if key == pygame.K_LEFT:
+                step = -step
+            replay["position"] = min(
+                max(replay["position"] + step, 0), replay["length"])
+            replay["playing"] = False
+        elif key == pygame.K_HOME:
+            replay["position"] = 0
 
     def update_tiles(self) -> None:
         """Update the tiles in the matrix to represent the algorithms progress."""
 
+        # Move the replay on (or carry on recording it)
+        if self.replay != None and self.replay["recording"]:
+            self.record_replay()
+        elif self.replay != None and self.replay["playing"]:
+            self.replay["position"] = min(
+                self.replay["position"] + self.replay["speed"], self.replay["length"])
+
         visited_draw_set = set(
             node for node in self.shared_memory["visited"] if node not in self.updated_tiles)
         for node in visited_draw_set:
@@ -315,9 +558,11 @@ class MapCreationWindow(object):
                 self.__tiles[node[0]][node[1]] = -1
                 self.updated_tiles.add(node)
 
-        if self.shared_memory["path"] != -1:
-            self.Process = None
-            for node in self.shared_memory["path"]:
+        path = self.shared_memory["path"]
+        if path != None:
+            self.solving = False
+        if path != None and path != -1:
+            for node in path:
                 # Check the node is in bounds
                 if (node[0] >= 0 and node[0] < self.__x_tiles) and (node[1] >= 0 and node[1] < self.__y_tiles):
                     self.__tiles[node[0]][node[1]] = -2
@@ -325,6 +570,29 @@ class MapCreationWindow(object):
     def __draw(self) -> None:
         """This function draws the interface on the pygame window."""
 
+        def get_replay_color(tile: tuple) -> tuple:
+            """Returns the colour of a tile at the current point of the replay."""
+
+            replay = self.replay
+            position = replay["position"]
+
+            # Once the replay is finished, show the paths.
+            if position >= replay["length"]:
+                if tile in replay["paths"][0]:
+                    return (128, 255, 128)
+                elif tile in replay["paths"][1]:
+                    return (128, 255, 200)
+
+            expanded = [first_expansions.get(tile, position) < position
+                        for first_expansions in replay["first expansions"]]
+            if expanded[0] and expanded[1]:
+                return (176, 128, 255)
+            elif expanded[0]:
+                return (128, 192, 255)
+            elif expanded[1]:
+                return (255, 224, 128)
+            return (255, 255, 255)
+
         def draw_tiles():
             """Draw the updated tiles on the screen."""
 
@@ -345,6 +613,8 @@ class MapCreationWindow(object):
                         color = (255, 128, 128)
                     elif tile_value >= 2:
                         color = (255, 128, 255)
+                    elif self.replay != None and not self.replay["recording"]:
+                        color = get_replay_color((x, y))
                     elif tile_value == -1:
                         color = (128, 128, 255)
                     elif tile_value == -2:
@@ -364,12 +634,38 @@ class MapCreationWindow(object):
             font = pygame.font.Font(
                 "freesansbold.ttf", self.windowSize[0] // 60)
             text = font.render(
-                "Controls: R - Reset screen, M1 - Remove tile, M2 - Reset tile, M3 - Set navigation node, ESC - Close window", True, (0, 0, 0), self.__bg_color)
+                "Controls: R - Reset screen, M1 - Remove tile, M2 - Reset tile, M3 - Set navigation node, T - Record and replay, S/L - Save/Load map, ESC - Close window", True, (0, 0, 0), self.__bg_color)
             text_rect = text.get_rect()
             text_rect.center = (
                 self.windowSize[0] // 2, self.windowSize[1] - 50)
             self.window.blit(text, text_rect)
 
+            if self.replay != None and self.replay["recording"]:
+                # Show how many nodes each search has expanded so far
+                status = [name + ": " + str(len(trace)) + " nodes"
+                          for name, trace in zip(self.replay["names"], self.replay["traces"])]
+                text = font.render("Recording - " + ", ".join(status) + " - R: Cancel",
+                                   True, (0, 0, 0), self.__bg_color)
+                text_rect = text.get_rect()
+                text_rect.center = (
+                    self.windowSize[0] // 2, self.windowSize[1] - 25)
+                self.window.blit(text, text_rect)
+            elif self.replay != None:
+                # Show how far through each recorded search the replay is
+                status = []
+                position = int(self.replay["position"])
+                for name, trace in zip(self.replay["names"], self.replay["traces"]):
+                    shown = min(position, len(trace))
+                    elapsed = trace.timestamps[shown - 1] * 1000 if shown else 0
+                    status.append(name + ": " + str(shown) + "/" + str(len(trace)) +
+                                  " nodes (" + str(round(elapsed, 2)) + "ms)")
+                text = font.render("Replay x" + str(self.replay["speed"]) + " - " + ", ".join(status) +
+                                   " - Space: Pause, Left/Right: Scrub, Up/Down: Speed", True, (0, 0, 0), self.__bg_color)
+                text_rect = text.get_rect()
+                text_rect.center = (
+                    self.windowSize[0] // 2, self.windowSize[1] - 25)
+                self.window.blit(text, text_rect)
+
         # Fill the background with the corresponding color
         self.window.fill(self.__bg_color)
 
@@ -398,15 +694,16 @@ class MapCreationWindow(object):
                     mouse_down = False
                 elif event.type == pygame.KEYDOWN:
                     key_down = True
+                    if self.replay != None:
+                        self.__replay_key_handler(event.key)
                 elif event.type == pygame.KEYUP:
                     key_down = False
 
-            # Handle keyboard and mouse events if process is not currently active
-            if self.Process == None:
-                if mouse_down:
-                    self.__mouse_handler()
-                elif key_down:
-                    self.__key_handler()
+            # Handle keyboard and mouse events, while a query is running only the keys which reset or close the window are handled
+            if not self.solving and mouse_down:
+                self.__mouse_handler()
+            elif key_down:
+                self.__key_handler()
 
             # Update the tiles matrix
             self.update_tiles()
@@ -414,8 +711,7 @@ class MapCreationWindow(object):
             # Call the draw function to update the display
             self.__draw()
 
-        if self.Process != None:
-            self.Process.close()
+        self.solver_service.stop()
         pygame.quit()
 
     def close(self):
@@ -425,6 +721,11 @@ class MapCreationWindow(object):
 
 
 if __name__ == "__main__":
+    # With arguments, run the headless command line interface instead of the GUI (see AStar_cli.py).
+    if len(sys.argv) > 1:
+        import AStar_cli
+        sys.exit(AStar_cli.main(["grid"] + sys.argv[1:]))
+
     settings = None
     while True:
         settings_window = DefineSettings(settings)
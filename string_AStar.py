@@ -1,61 +1,176 @@
 #!/usr/bin/python3
-import tkinter as tk
-import tkinter.scrolledtext as tkst
-import AStar
+import AStar_multiprocessing
+import multiprocessing
 import random
+import sys
 
-# Create tkinter window
-string_change = tk.Tk()
-string_change.resizable(0, 0)
-string_change.title('A* - String Change')
+# How often (in ms) the solving process is polled for progress
+POLL_INTERVAL = 100
 
-# Start Input
-start_input = tk.Entry(string_change)
-start_input.grid(column=2, row=2, sticky=tk.W)
-start_inputLabel = tk.Label(string_change, text="Enter start text here: ")
-start_inputLabel.grid(column=1, row=2, sticky=tk.E)
+# The manager is created when it is first needed, so importing this file in the solving process doesn't start another one.
+manager = None
+solver_process = None
+shared_memory = None
 
-# Goal Input
-goal_input = tk.Entry(string_change)
-goal_input.grid(column=2, row=0, sticky=tk.W)
-start_inputLabel = tk.Label(string_change, text="Enter goal text here: ")
-start_inputLabel.grid(column=1, row=0, sticky=tk.E)
+# The window and its widgets are created by build_window, tkinter is only imported there so this file can be imported without a display.
+tk = None
+string_change = None
+start_input = None
+goal_input = None
+submit = None
+cancel = None
+shuffle = None
+status_label = None
+output_box = None
 
-# Submit button
 
-submit = tk.Button(string_change, text="submit",
-                   command=lambda: submit_action())
-submit.grid(column=2, row=3, sticky=tk.W, padx=(5, 0))
+def build_window():
+    """
+    Create the string change window.
+    """
+
+    global tk, string_change, start_input, goal_input, submit, cancel, shuffle, status_label, output_box
+
+    import tkinter as tk
+    import tkinter.scrolledtext as tkst
+
+    # Create tkinter window
+    string_change = tk.Tk()
+    string_change.resizable(0, 0)
+    string_change.title('A* - String Change')
+
+    # Start Input
+    start_input = tk.Entry(string_change)
+    start_input.grid(column=2, row=2, sticky=tk.W)
+    start_inputLabel = tk.Label(string_change, text="Enter start text here: ")
+    start_inputLabel.grid(column=1, row=2, sticky=tk.E)
+
+    # Goal Input
+    goal_input = tk.Entry(string_change)
+    goal_input.grid(column=2, row=0, sticky=tk.W)
+    start_inputLabel = tk.Label(string_change, text="Enter goal text here: ")
+    start_inputLabel.grid(column=1, row=0, sticky=tk.E)
+
+    # Submit button
+    submit = tk.Button(string_change, text="submit",
+                       command=lambda: submit_action())
+    submit.grid(column=2, row=3, sticky=tk.W, padx=(5, 0))
+
+    # Cancel button
+    cancel = tk.Button(string_change, text="cancel", state=tk.DISABLED,
+                       command=lambda: cancel_action())
+    cancel.grid(column=3, row=3, sticky=tk.W, padx=(5, 0))
+
+    # Auto-shuffle button
+    shuffle = tk.Button(string_change, text="shuffle",
+                        command=lambda: shuffle_action(goal_input.get()))
+    shuffle.grid(column=1, row=3, sticky=tk.E, padx=(0, 5))
+
+    # Status label (shows live progress of the running solve)
+    status_label = tk.Label(string_change, text="")
+    status_label.grid(column=0, columnspan=4, row=5, sticky=tk.W)
+
+    # Output box
+    output_box = tkst.ScrolledText(
+        string_change, state=tk.DISABLED, width=40, height=10)
+    output_box.grid(column=0, columnspan=4, row=4, rowspan=1)
 
 
 def submit_action():
     """
-    Submit the information and begin the string reorganisation process.
+    Submit the information and begin the string reorganisation process.\n
+    The solver runs on another process, if a solve is already running it is cancelled and replaced by this one.
     """
 
-    # Disable the buttons
-    submit.configure(state=tk.DISABLED)
-    shuffle.configure(state=tk.DISABLED)
+    global manager, solver_process, shared_memory
 
     # Get our start and goal strings
     goal = goal_input.get()
     start = start_input.get()
 
-    # Initalise variables to store results
-    path = []
-    time_taken = 0
-    nodes_considered = 0
-
-    # Create the sovler object, and initiate the solving process
-    try:
-        solver = AStar.StringSolver(start, goal)
-        solver.solve()
-        path = solver.path
-        time_taken = solver.time_taken
-        nodes_considered = solver.nodes_considered
-    except:
+    # Stop any solve that is already running, the new submit takes over.
+    stop_process()
+
+    if manager == None:
+        manager = multiprocessing.Manager()
+
+    shared_memory = manager.dict({
+        "path": None,
+        "nodes considered": 0,
+        "time taken": 0
+    })
+
+    # Create and start the solving process, then begin polling it for results
+    solver_process = AStar_multiprocessing.StringProcess(
+        start, goal, shared_memory)
+    solver_process.start()
+
+    cancel.configure(state=tk.NORMAL)
+    status_label.configure(text="Solving... Nodes Considered: 0")
+    string_change.after(POLL_INTERVAL, lambda: poll_process(solver_process))
+
+
+def poll_process(process):
+    """
+    Check on the progress of the given solving process, called by the tkinter loop every POLL_INTERVAL ms.\n
+    If the process has been replaced or cancelled the polling stops.
+    """
+
+    if process is not solver_process:
+        return
+
+    if process.is_alive():
+        status_label.configure(
+            text="Solving... Nodes Considered: " + str(shared_memory["nodes considered"]))
+        string_change.after(POLL_INTERVAL, lambda: poll_process(process))
+        return
+
+    path = shared_memory["path"]
+    if path == None or path == -1:
         path = ["No path"]
 
+    show_results(path, shared_memory["time taken"],
+                 shared_memory["nodes considered"])
+    finish_process("Done.")
+
+
+def cancel_action():
+    """
+    Cancel the running solve.
+    """
+
+    stop_process()
+    status_label.configure(text="Cancelled.")
+
+
+def stop_process():
+    """
+    Terminate the solving process (if there is one running).
+    """
+
+    if solver_process != None and solver_process.is_alive():
+        solver_process.terminate()
+        solver_process.join()
+    finish_process("")
+
+
+def finish_process(status: str):
+    """
+    Forget about the current solving process and reset the controls.
+    """
+
+    global solver_process
+
+    solver_process = None
+    cancel.configure(state=tk.DISABLED)
+    status_label.configure(text=status)
+
+
+def show_results(path: list, time_taken: int, nodes_considered: int):
+    """
+    Put the results of a solve in the output box.
+    """
+
     # Enable the output box and empty it
     output_box.configure(state=tk.NORMAL)
     output_box.delete(1.0, tk.END)
@@ -70,17 +185,6 @@ def submit_action():
     # Disable the output box so the user can't type in it
     output_box.configure(state=tk.DISABLED)
 
-    # Re-enable submit and shuffle buttons
-    submit.configure(state=tk.NORMAL)
-    shuffle.configure(state=tk.NORMAL)
-
-# Auto-shuffle button
-
-
-shuffle = tk.Button(string_change, text="shuffle",
-                    command=lambda: shuffle_action(goal_input.get()))
-shuffle.grid(column=1, row=3, sticky=tk.E, padx=(0, 5))
-
 
 def shuffle_action(goal):
     """
@@ -96,10 +200,12 @@ def shuffle_action(goal):
     start_input.insert(0, start)
 
 
-# Output box
-output_box = tkst.ScrolledText(
-    string_change, state=tk.DISABLED, width=40, height=10)
-output_box.grid(column=0, columnspan=4, row=4, rowspan=1)
+if __name__ == "__main__":
+    # With arguments, run the headless command line interface instead of the GUI (see AStar_cli.py).
+    if len(sys.argv) > 1:
+        import AStar_cli
+        sys.exit(AStar_cli.main(["string"] + sys.argv[1:]))
 
-# Open the window
-string_change.mainloop()
+    # Open the window
+    build_window()
+    string_change.mainloop()